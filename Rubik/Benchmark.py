@@ -0,0 +1,534 @@
+import time
+import sys
+import os
+import tracemalloc
+import contextlib
+from random import seed, choice
+from rubikCube import RubikPuzzle, ActionList, InitialConf, LoadCubeCSV
+from rubikCube import PatternBasedHeuristic, IDA_Star, IDAStar, SymmetricPatternHeuristic
+from rubikCube import MovePruning, ParentPruning, PruningKey
+from rubikCube import CornerPatternDatabase, CompositeHeuristic
+from rubikCube import EdgePatternDatabase, MeetInTheMiddle
+from rubikCube import ApplyAction, CornerIndex, TrajectoryFromActions, TranspositionTable
+from rubikCube import RenderConfiguration, CompactString, ColorMap, code, BLANK, FILL, K
+from termcolor import colored
+from cubieCube import CubieCube, ApplyCubieAction
+from patternStore import PatternDirectory
+from searchStats import SearchStats
+from cubeBatch import CubeBatch, BreadthFirstLayers
+from twoPhase import TwoPhaseSolver, TurnActions
+from benchmarkSuite import SeededScramble
+
+ScriptDir = os.path.dirname(os.path.abspath(__file__))
+
+
+def BenchmarkMoves(n=120000):
+    """
+    Micro-benchmark of the moves, reports the moves per second of the
+    reference apply (built from the pairs of letters) and of the
+    compiled permutation tables
+    :param n: Number of moves to apply with each implementation
+    """
+    seed(0)
+    sequence = [choice(ActionList) for _ in range(n)]
+
+    # Before: every move is rebuilt from the pairs of letters
+    before = RubikPuzzle()
+    StartTime = time.perf_counter()
+    for action in sequence:
+        before.applyReference(action)
+    SlowTime = time.perf_counter() - StartTime
+
+    # After: the compiled permutation tables
+    after = RubikPuzzle()
+    StartTime = time.perf_counter()
+    for action in sequence:
+        after.apply(action)
+    FastTime = time.perf_counter() - StartTime
+
+    # Both implementations must end in the same configuration
+    assert before.configuration == after.configuration
+    print(f"Moves applied: {n}")
+    print(f"Reference apply: {n/SlowTime:,.0f} moves/s")
+    print(f"Compiled apply:  {n/FastTime:,.0f} moves/s")
+    print(f"Speedup: {SlowTime/FastTime:.1f}x")
+
+def Scramble(n, SeedValue=0):
+    """
+    Seeded scramble, reproducible between runs
+    :param n: Number of random actions from the solved cube
+    :param SeedValue: Seed of the random generator
+    :return: The scrambled cube
+    """
+    seed(SeedValue)
+    cube = RubikPuzzle()
+    for _ in range(n):
+        cube.apply(choice(ActionList))
+    return cube
+
+def BenchmarkInPlace(n=12, depth=4):
+    """
+    Compares the IDA* that creates a node for each successor against
+    the in-place mode (make/unmake on a single cube)
+    :param n: Moves of the scramble
+    :param depth: Depth of the pattern database
+    """
+    cube = Scramble(n)
+    heuristic = PatternBasedHeuristic(depth=depth)
+    stop = lambda state: state.configuration == InitialConf
+    g = lambda state: state.GetDepth()
+    h = lambda state: heuristic.Heurisic(state)
+    results = {}
+    for inplace in (False, True):
+        StartTime = time.perf_counter()
+        solution = IDA_Star(cube, stop, g, h, inplace)
+        results[inplace] = (len(solution)-1, time.perf_counter() - StartTime)
+    assert results[False][0] == results[True][0]
+    print(f"Solution length: {results[True][0]}")
+    print(f"Node per successor: {results[False][1]:.2f} seconds")
+    print(f"In-place:           {results[True][1]:.2f} seconds")
+    print(f"Speedup: {results[False][1]/results[True][1]:.1f}x")
+
+def BenchmarkPruning(depth=3):
+    """
+    Nodes generated by each IDA* bound on the Moves.csv scramble, only
+    removing the predecessor against the MovePruning table, and the
+    asymptotic branching factor of each table: the growth of the number
+    of sequences it allows per depth, 11.0 for the parent pruning and
+    9.374 for MovePruning. The growth of the nodes of the last bounds of
+    a scramble depends on the heuristic and is not that factor
+    :param depth: Depth of the pattern database
+    """
+    cube = RubikPuzzle(pattern=LoadCubeCSV(os.path.join(ScriptDir, 'Moves.csv')))
+    heuristic = PatternBasedHeuristic(depth=depth)
+    # Every generated node is evaluated once by the heuristic
+    nodes = [0]
+    def h(state):
+        nodes[0] += 1
+        return heuristic.Heurisic(state)
+    stop = lambda state: state.configuration == InitialConf
+    g = lambda state: state.GetDepth()
+    counts = {}
+    for name, table in (("parent", ParentPruning), ("pruned", MovePruning)):
+        counts[name] = []
+        bound = h(cube)
+        while True:
+            nodes[0] = 0
+            state = RubikPuzzle()
+            state.configuration = cube.configuration
+            found, value = IDAStar._search_in_place(state, [], None, stop, g, h, bound, table)
+            counts[name].append((bound, nodes[0]))
+            if found or value == float('inf'):
+                break
+            bound = value
+    print(f"{'bound':>6} {'parent':>10} {'pruned':>10} {'reduction':>10}")
+    for (bound, before), (_, after) in zip(counts["parent"], counts["pruned"]):
+        print(f"{bound:>6} {before:>10} {after:>10} {before/after:>9.2f}x")
+    # Growth of the nodes between the last two bounds, only for this scramble
+    for name in counts:
+        if len(counts[name]) > 1:
+            print(f"Node growth of the last bound ({name}): {counts[name][-1][1]/counts[name][-2][1]:.2f}")
+    for name, table in (("parent", ParentPruning), ("pruned", MovePruning)):
+        print(f"Asymptotic branching factor ({name}): {SequenceGrowth(table):.3f}")
+
+def SequenceGrowth(table, depth=20):
+    """
+    Branching factor of a pruning table, without heuristic: the number of
+    sequences of actions it allows at a depth over the number at the
+    depth before
+    :param table: MovePruning or ParentPruning
+    :param depth: Length of the sequences
+    :return: The ratio of the last two depths
+    """
+    # Sequences of each length, by the key of their last move
+    counts = {None:1}
+    totals = [1]
+    for _ in range(depth):
+        following = {}
+        for last, count in counts.items():
+            for action in table[last]:
+                key = PruningKey(last, action)
+                following[key] = following.get(key, 0)+count
+        counts = following
+        totals.append(sum(counts.values()))
+    return totals[-1]/totals[-2]
+
+def BenchmarkComposite(scrambles=(10, 12, 14), SeedValue=0):
+    """
+    Nodes generated by IDA* with the corner database alone against the
+    maximum of the corners and two groups of 6 edges
+    :param scrambles: Moves of each seeded scramble
+    :param SeedValue: Seed of the scrambles
+    """
+    corners = CornerPatternDatabase(directory=PatternDirectory)
+    composite = CompositeHeuristic.CornersAndEdges(directory=PatternDirectory)
+    stop = lambda state: state.configuration == InitialConf
+    g = lambda state: state.GetDepth()
+    print(f"{'scramble':>8} {'length':>6} {'corners':>10} {'composite':>10} {'time':>14}")
+    for n in scrambles:
+        cube = Scramble(n, SeedValue)
+        results = []
+        for heuristic in (corners, composite):
+            # Every generated node is evaluated once by the heuristic
+            nodes = [0]
+            def h(state):
+                nodes[0] += 1
+                return heuristic.Heurisic(state)
+            StartTime = time.perf_counter()
+            solution = IDA_Star(cube, stop, g, h, inplace=True)
+            results.append((len(solution)-1, nodes[0], time.perf_counter() - StartTime))
+        assert results[0][0] == results[1][0]
+        print(f"{n:>8} {results[0][0]:>6} {results[0][1]:>10} {results[1][1]:>10} "
+        f"{results[0][2]:>6.2f}/{results[1][2]:<6.2f}s")
+
+def BenchmarkParallelBuild(depth=None):
+    """
+    Time to compute an edge pattern database with 1, 2, 4 and all the
+    processors. Every table must be byte-identical to the serial one
+    :param depth: the maximum depth of the states in the base
+    """
+    counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    times = {}
+    for workers in counts:
+        StartTime = time.perf_counter()
+        database = EdgePatternDatabase(depth=depth, workers=workers)
+        times[workers] = time.perf_counter() - StartTime
+        if workers == 1:
+            serial = database.table
+        else:
+            assert database.table == serial
+    print(f"{'workers':>7} {'time':>8} {'speedup':>8}")
+    for workers in counts:
+        print(f"{workers:>7} {times[workers]:>7.2f}s {times[1]/times[workers]:>7.2f}x")
+
+def BenchmarkParallelSearch(scrambles=(14, 15), SeedValue=1):
+    """
+    Serial IDA* against the root-split parallel search with all the
+    processors, both must find solutions of the same length
+    :param scrambles: Moves of each seeded scramble
+    :param SeedValue: Seed of the scrambles
+    """
+    heuristic = CompositeHeuristic.CornersAndEdges(directory=PatternDirectory)
+    stop = lambda state: state.configuration == InitialConf
+    g = lambda state: state.GetDepth()
+    h = lambda state: heuristic.Heurisic(state)
+    # At least 2, one process is the serial search
+    workers = max(os.cpu_count() or 1, 2)
+    print(f"{'scramble':>8} {'length':>6} {'serial':>8} {f'{workers} workers':>10}")
+    for n in scrambles:
+        cube = Scramble(n, SeedValue)
+        StartTime = time.perf_counter()
+        serial = IDA_Star(cube, stop, g, h, inplace=True)
+        SerialTime = time.perf_counter() - StartTime
+        StartTime = time.perf_counter()
+        parallel = IDA_Star(cube, stop, g, h, workers=workers)
+        ParallelTime = time.perf_counter() - StartTime
+        assert len(serial) == len(parallel)
+        assert parallel[-1].configuration == InitialConf
+        print(f"{n:>8} {len(serial)-1:>6} {SerialTime:>7.2f}s {ParallelTime:>9.2f}s")
+
+def BenchmarkCubie(n=120000):
+    """
+    Moves and corner indices per second of the facelet configuration
+    against the cubie state
+    :param n: Number of moves to apply with each representation
+    """
+    seed(0)
+    sequence = [choice(ActionList) for _ in range(n)]
+    configuration = RubikPuzzle().configuration
+    StartTime = time.perf_counter()
+    for action in sequence:
+        configuration = ApplyAction(configuration, action)
+        CornerIndex(configuration)
+    FaceletTime = time.perf_counter() - StartTime
+    cube = CubieCube()
+    state = cube.state
+    StartTime = time.perf_counter()
+    for action in sequence:
+        state = ApplyCubieAction(state, action)
+        cube.state = state
+        cube.CornerIndex()
+    CubieTime = time.perf_counter() - StartTime
+    assert CubieCube(state).Configuration() == configuration
+    print(f"Facelets (move + corner index): {n/FaceletTime:,.0f} nodes/s")
+    print(f"Cubies (move + corner index):   {n/CubieTime:,.0f} nodes/s")
+    print(f"Speedup: {FaceletTime/CubieTime:.1f}x")
+
+def BenchmarkTwoPhase(cubes=8, budget=2, SeedValue=5):
+    """
+    Two-phase solver on random-state cubes: time and face turns of the
+    first solution, and face turns after searching for budget seconds
+    :param cubes: Number of cubes
+    :param budget: Seconds to look for shorter solutions
+    :param SeedValue: Seed of the scrambles
+    """
+    StartTime = time.perf_counter()
+    solver = TwoPhaseSolver()
+    print(f"Tables: {time.perf_counter()-StartTime:.2f} seconds")
+    print(f"{'cube':>4} {'first':>6} {'time':>7} {f'{budget}s budget':>10}")
+    for i in range(cubes):
+        # 60 random actions, far from the solved cube
+        cube = Scramble(60, SeedValue+i)
+        StartTime = time.perf_counter()
+        first = solver.Solve(cube)
+        FirstTime = time.perf_counter() - StartTime
+        best = solver.Solve(cube, budget)
+        for turns in (first, best):
+            assert TrajectoryFromActions(cube, TurnActions(turns))[-1].configuration == InitialConf
+        print(f"{i:>4} {len(first):>6} {FirstTime:>6.3f}s {len(best):>10}")
+
+def BenchmarkBidirectional(scrambles=(10, 12, 14), depth=6, SeedValue=1):
+    """
+    Forward search to a MeetInTheMiddle table, without and with the
+    composite heuristic, against IDA*. The table is built only once
+    :param scrambles: Moves of each seeded scramble
+    :param depth: Depth of the table from the solved cube
+    :param SeedValue: Seed of the scrambles
+    """
+    StartTime = time.perf_counter()
+    table = MeetInTheMiddle(depth)
+    print(f"Table: {len(table.table)} configurations in {time.perf_counter()-StartTime:.2f} seconds")
+    heuristic = CompositeHeuristic.CornersAndEdges(directory=PatternDirectory)
+    stop = lambda state: state.configuration == InitialConf
+    g = lambda state: state.GetDepth()
+    h = lambda state: heuristic.Heurisic(state)
+    print(f"{'scramble':>8} {'length':>6} {'table':>8} {'table+h':>8} {'IDA*':>8}")
+    for n in scrambles:
+        cube = Scramble(n, SeedValue)
+        times = []
+        for solve in (lambda: table.Solve(cube), lambda: table.Solve(cube, h=h),
+        lambda: IDA_Star(cube, stop, g, h, inplace=True)):
+            StartTime = time.perf_counter()
+            solution = solve()
+            times.append(time.perf_counter() - StartTime)
+            assert solution[-1].configuration == InitialConf
+            if len(times) == 1:
+                length = len(solution)-1
+            assert len(solution)-1 == length
+        print(f"{n:>8} {length:>6} {times[0]:>7.2f}s {times[1]:>7.2f}s {times[2]:>7.2f}s")
+
+def BenchmarkStats(n=16, SeedValue=1, workers=2):
+    """
+    Cost of the counters: the same IDA* without and with a SearchStats,
+    then the counters of each bound as JSON, and the counters of the
+    parallel search (only the nodes above the split)
+    :param n: Moves of the seeded scramble
+    :param SeedValue: Seed of the scramble
+    :param workers: Processes of the parallel search
+    """
+    heuristic = CompositeHeuristic.CornersAndEdges(directory=PatternDirectory)
+    stop = lambda state: state.configuration == InitialConf
+    g = lambda state: state.GetDepth()
+    h = lambda state: heuristic.Heurisic(state)
+    cube = Scramble(n, SeedValue)
+    StartTime = time.perf_counter()
+    IDA_Star(cube, stop, g, h, inplace=True)
+    DisabledTime = time.perf_counter() - StartTime
+    stats = SearchStats(heuristic)
+    StartTime = time.perf_counter()
+    IDA_Star(cube, stop, g, h, inplace=True, stats=stats)
+    EnabledTime = time.perf_counter() - StartTime
+    stats.Detach(heuristic)
+    print(stats.Dump())
+    print(f"Disabled: {DisabledTime:.2f} seconds")
+    print(f"Enabled:  {EnabledTime:.2f} seconds ({EnabledTime/DisabledTime-1:+.1%})")
+    stats = SearchStats(heuristic)
+    solution = IDA_Star(cube, stop, g, h, workers=workers, stats=stats)
+    stats.Detach(heuristic)
+    assert solution[-1].configuration == InitialConf
+    totals = stats.Totals()
+    print(f"Parallel ({workers} workers): {totals['iterations']} iterations, "
+    f"{totals['generated']} nodes above the split")
+
+def BenchmarkSymmetry(depths=(4, 5, 6), samples=2000):
+    """
+    Corner pattern database with every configuration against the one
+    reduced by the 16 U/D symmetries: entries, build time, time of a
+    lookup, and the values must be equal
+    :param depths: Depths of the databases
+    :param samples: Random cubes compared for each depth
+    """
+    print(f"{'depth':>5} {'entries':>8} {'reduced':>8} {'ratio':>6} {'build':>14} {'lookup':>14}")
+    for depth in depths:
+        StartTime = time.perf_counter()
+        full = PatternBasedHeuristic(depth=depth)
+        FullTime = time.perf_counter() - StartTime
+        StartTime = time.perf_counter()
+        reduced = SymmetricPatternHeuristic(depth=depth)
+        ReducedTime = time.perf_counter() - StartTime
+        seed(depth)
+        cubes = []
+        for i in range(samples):
+            cube = RubikPuzzle()
+            for _ in range(i%(depth+4)):
+                cube.apply(choice(ActionList))
+            cubes.append(cube)
+        lookups = []
+        for heuristic in (full, reduced):
+            StartTime = time.perf_counter()
+            values = [heuristic.Heurisic(cube) for cube in cubes]
+            lookups.append((values, (time.perf_counter() - StartTime)/samples*1e6))
+        assert lookups[0][0] == lookups[1][0]
+        print(f"{depth:>5} {len(full.patterns):>8} {len(reduced.patterns):>8} "
+        f"{len(full.patterns)/len(reduced.patterns):>5.1f}x {FullTime:>6.2f}/{ReducedTime:<6.2f}s "
+        f"{lookups[0][1]:>5.1f}/{lookups[1][1]:<5.1f}us")
+
+def BenchmarkBatch(n=200000, moves=20, depth=6):
+    """
+    Moves per second of RubikPuzzle.apply, one cube at a time, against
+    the same move on a whole CubeBatch, and the layers of a breadth-first
+    search done on batches
+    :param n: Cubes of the batch
+    :param moves: Moves applied to every cube
+    :param depth: Layers of the breadth-first search
+    """
+    seed(0)
+    sequence = [choice(ActionList) for _ in range(moves)]
+    single = [RubikPuzzle() for _ in range(n//100)]
+    StartTime = time.perf_counter()
+    for action in sequence:
+        for cube in single:
+            cube.apply(action)
+    SingleTime = (time.perf_counter() - StartTime)/len(single)
+    batch = CubeBatch.Solved(n)
+    StartTime = time.perf_counter()
+    for action in sequence:
+        batch.apply(action)
+    BatchTime = (time.perf_counter() - StartTime)/n
+    assert batch.Configurations()[:len(single)] == [cube.configuration for cube in single]
+    print(f"RubikPuzzle.apply: {moves/SingleTime:,.0f} moves/s")
+    print(f"CubeBatch.apply:   {moves/BatchTime:,.0f} moves/s ({n} cubes)")
+    print(f"Speedup: {SingleTime/BatchTime:.1f}x")
+    StartTime = time.perf_counter()
+    counts = BreadthFirstLayers(depth)
+    print(f"Breadth-first layers {counts} in {time.perf_counter()-StartTime:.2f} seconds")
+
+def BenchmarkPacked(samples=20000):
+    """
+    Edge pattern database with a byte per entry against the one with two
+    entries per byte: peak memory and time of the build, time of a
+    lookup, and the values must be equal
+    :param samples: Random cubes compared
+    """
+    seed(0)
+    cubes = []
+    for i in range(samples):
+        cube = RubikPuzzle()
+        for _ in range(i%20):
+            cube.apply(choice(ActionList))
+        cubes.append(cube)
+    results = []
+    for packed in (False, True):
+        tracemalloc.start()
+        StartTime = time.perf_counter()
+        database = EdgePatternDatabase(packed=packed)
+        BuildTime = time.perf_counter() - StartTime
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        StartTime = time.perf_counter()
+        values = [database.Heurisic(cube) for cube in cubes]
+        LookupTime = (time.perf_counter() - StartTime)/samples*1e6
+        results.append(values)
+        print(f"{'Packed' if packed else 'Bytes':<6}: table {len(database.table)/1e6:.1f} MB, "
+        f"peak {peak/1e6:.1f} MB, build {BuildTime:.1f}s, lookup {LookupTime:.2f}us")
+        del database
+    assert results[0] == results[1]
+
+def BenchmarkTranspositions(depths=(9, 10, 11), count=2, sizes=(1<<12, 1<<16, 1<<20)):
+    """
+    Generated nodes of the in-place IDA* with the corner database, with
+    and without a transposition table of each size, on the seeded
+    scrambles of the benchmark suite. With the move pruning almost every
+    transposition is already removed, with the parent pruning they are
+    the duplicates of the search
+    :param depths: Depths of the scrambles
+    :param count: Scrambles of each depth
+    :param sizes: Slots of the tables
+    """
+    heuristic = CornerPatternDatabase(directory=PatternDirectory)
+    stop = lambda state: state.configuration == InitialConf
+    g = lambda state: state.GetDepth()
+    cubes = [SeededScramble(depth, 1000*depth+index) for depth in depths for index in range(count)]
+    print(f"{'pruning':<8} {'table':>8} {'memory':>9} {'nodes':>9} {'saved':>6} {'time':>7}")
+    for pruning in (True, False):
+        BaseNodes = None
+        for size in (None,)+tuple(sizes):
+            nodes = 0
+            memory = 0
+            StartTime = time.perf_counter()
+            for cube in cubes:
+                table = None if size == None else TranspositionTable(size)
+                with contextlib.redirect_stdout(None):
+                    result = IDAStar.run(cube, stop, g, heuristic.Heurisic, progress=lambda _: None,
+                    inplace=True, pruning=pruning, transpositions=table)
+                assert result.status == result.Solved
+                nodes += result.nodes
+                if table != None:
+                    memory = max(memory, table.Memory())
+            elapsed = time.perf_counter() - StartTime
+            if BaseNodes == None:
+                BaseNodes = nodes
+            print(f"{'move' if pruning else 'parent':<8} {size or '-':>8} {memory/1e6:>7.1f}MB "
+            f"{nodes:>9} {1-nodes/BaseNodes:>6.1%} {elapsed:>6.2f}s")
+
+def BenchmarkRender(n=2000):
+    """
+    Drawings per second of a solution path: the text built with one
+    colored call per facelet, the cached drawing without and with the
+    cache, and the compact text
+    :param n: Number of different cubes
+    """
+    seed(0)
+    cube = RubikPuzzle()
+    configurations = []
+    for _ in range(n):
+        cube.apply(choice(ActionList))
+        configurations.append(cube.configuration)
+    def Reference(configuration):
+        # The drawing before the cached blocks, one colored call per facelet
+        block = lambda letter: colored(chr(FILL), ColorMap[(configuration>>code[letter][0])&7])*K
+        rows = ['ABC', 'DEF', 'GHI', 'JKLMNÑOPQRST', 'UVWXYZabcdef', 'ghijklmnñopq', 'rst', 'uvw', 'xyz']
+        return '\n'+''.join((BLANK if len(row) == 3 else '')+''.join(map(block, row))+'\n' for row in rows)
+    RenderConfiguration.cache_clear()
+    for name, render in (("colored per facelet", Reference),
+    ("block strings", RenderConfiguration.__wrapped__),
+    ("cached", RenderConfiguration), ("compact", CompactString)):
+        StartTime = time.perf_counter()
+        texts = [render(configuration) for configuration in configurations]
+        if name == "cached":
+            # Second pass, every drawing is in the cache
+            StartTime = time.perf_counter()
+            texts = [render(configuration) for configuration in configurations]
+        elapsed = time.perf_counter() - StartTime
+        if name != "compact":
+            assert texts[-1] == Reference(configurations[-1])
+        print(f"{name:<20} {n/elapsed:>12,.0f} states/s")
+
+Benchmarks = {
+    "moves": BenchmarkMoves,
+    "inplace": BenchmarkInPlace,
+    "pruning": BenchmarkPruning,
+    "composite": BenchmarkComposite,
+    "pdbbuild": BenchmarkParallelBuild,
+    "parallel": BenchmarkParallelSearch,
+    "cubie": BenchmarkCubie,
+    "twophase": BenchmarkTwoPhase,
+    "bidirectional": BenchmarkBidirectional,
+    "stats": BenchmarkStats,
+    "symmetry": BenchmarkSymmetry,
+    "batch": BenchmarkBatch,
+    "packed": BenchmarkPacked,
+    "transpositions": BenchmarkTranspositions,
+    "render": BenchmarkRender,
+}
+
+if __name__ == "__main__":
+
+    # Name of the benchmark to run, all of them if not given
+    names = sys.argv[1:] or list(Benchmarks)
+    for name in names:
+        if name not in Benchmarks:
+            print(f"Unknown benchmark '{name}'. Options: {', '.join(Benchmarks)}")
+            sys.exit(1)
+        print(f"\n--- {name} ---")
+        Benchmarks[name]()
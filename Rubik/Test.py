@@ -7,8 +7,8 @@ import heapq
 from random import seed
 from termcolor import colored
 from random import choice
-from itertools import product
 import copy
+from rubikCube import MovePruning, ParentPruning, PruningKey
 
 
 def Trajectory(end):
@@ -29,39 +29,89 @@ class AStar:
     """
 
     @staticmethod
-    def search(origin, stop,g,h):
+    def search(origin, stop, g, h, MaxNodes=None, MaxStored=None, stats=None):
         """
         :param source: Initial state
         :param stop: Stop funtion, true for the goal state
         :param g: Cumulative cost function
         :param h: Heuristic function, estimated cost to the goal
-        """
-        #Priority queue
-        agenda = []
-        # Set of state expanded
-        expanded = set()
+        :param MaxNodes: Maximum number of expanded nodes, no limit if None
+        :param MaxStored: Maximum number of entries of the priority queue
+        (stale ones included) and the dictionary of costs together, the
+        dictionary also holds the closed configurations
+        :param stats: Optional dictionary, filled with the counters of the
+        search: expanded, generated, stale, open (entries of the priority
+        queue), closed (expanded configurations), entries (the count
+        limited by MaxStored) and aborted
+        :return: The trajectory to the goal, None if there is no solution
+        or the search was aborted by a budget
+        """
+        if stats == None:
+            stats = {}
+        stats.update(expanded=0, generated=1, stale=0, open=0, closed=0, entries=0, aborted=None)
         #Trivial condition
         if stop(origin):
             return Trajectory(origin)
-        
-        #Initial state of the priority queue | The priority will be f(s) = g(s) + h(s)
-        f = lambda s: g(s) + h(s)
-        heapq.heappush(agenda,(f(origin), origin))
+
+        #Priority queue of tuples (f, counter, state) | f(s) = g(s) + h(s)
+        #The counter breaks the ties in insertion order, so the states
+        #are never compared
+        agenda = []
+        counter = 0
+        # Best cost found for each configuration, the int is the key
+        best = {origin.configuration:g(origin)}
+        # Configurations already expanded
+        closed = set()
+        heapq.heappush(agenda,(g(origin) + h(origin), counter, origin))
 
         #While agenda unlike empty
         while agenda:
-            node = heapq.heappop(agenda)[1]
-            expanded.add(node)
+            node = heapq.heappop(agenda)[2]
+            configuration = node.configuration
+            # Lazy deletion: a cheaper entry of the same configuration
+            # was pushed after this one
+            if configuration in closed or g(node) > best[configuration]:
+                stats["stale"] += 1
+                continue
             if stop(node):
+                AStar._sizes(stats, agenda, closed, best)
                 return Trajectory(node)
+            if MaxNodes != None and stats["expanded"] >= MaxNodes:
+                stats["aborted"] = "nodes"
+                break
+            if MaxStored != None and len(agenda) + len(best) >= MaxStored:
+                stats["aborted"] = "memory"
+                break
+            closed.add(configuration)
+            stats["expanded"] += 1
             for sucessor in node.Expand():
-                if sucessor not in expanded:
-                    heapq.heappush(agenda, (f(sucessor), sucessor))
+                stats["generated"] += 1
+                key = sucessor.configuration
+                cost = g(sucessor)
+                if key in closed or cost >= best.get(key, float('inf')):
+                    continue
+                best[key] = cost
+                counter += 1
+                heapq.heappush(agenda, (cost + h(sucessor), counter, sucessor))
+        AStar._sizes(stats, agenda, closed, best)
+        if stats["aborted"] != None:
+            print(f"A* aborted by the {stats['aborted']} budget: {stats['expanded']} expanded, "
+            f"{stats['generated']} generated, {stats['stale']} stale, {stats['open']} open, "
+            f"{stats['closed']} closed")
         return None
-    
+
+    @staticmethod
+    def _sizes(stats, agenda, closed, best):
+        """
+        Records the sizes of the structures of the search
+        """
+        stats["open"] = len(agenda)
+        stats["closed"] = len(closed)
+        stats["entries"] = len(agenda) + len(best)
+
 #Definition in the function for A*
-def A_Star(p, stop, g, h):
-    return AStar.search(p, stop, g, h)
+def A_Star(p, stop, g, h, MaxNodes=None, MaxStored=None, stats=None):
+    return AStar.search(p, stop, g, h, MaxNodes, MaxStored, stats)
 
 #Color codes
 #White
@@ -249,10 +299,13 @@ class RubikPuzzle():
         """
         self.parent = parent
         self.depth = depth
+        # The last move, key of the pruning tables
+        self.last = None
         if parent != None and action!=None:
             # the cube is created from the parent's configuration
             self.configuration = parent.configuration
             self.apply(action)
+            self.last = PruningKey(parent.last, action)
         elif pattern!=None:
             # the configuration is established with the map
             self.configuration = self.initialize(pattern)
@@ -406,12 +459,15 @@ class RubikPuzzle():
         for i in range(0,n):
             self.apply((choice([0,1,2]),choice([0,1]),choice([0,1])))
             
-    def Expand(self):
-        # we remove the predecessor
-        return list(filter(lambda x: \
-        (x!=self.parent), \
-        [RubikPuzzle(self,action,self.depth+1) \
-        for action in product([0,1,2],[0,1],[0,1])]))
+    def Expand(self, pruning=True):
+        """
+        Generates the successors of the cube
+        :param pruning: If true the redundant sequences are pruned with
+        MovePruning, if false only the predecessor is removed
+        :return: list with the successors
+        """
+        table = MovePruning if pruning else ParentPruning
+        return [RubikPuzzle(self,action,self.depth+1) for action in table[self.last]]
 
 
 class PatternBasedHeuristic:
@@ -502,10 +558,14 @@ if __name__ == "__main__":
     print("\nExecute search A*...\n")
     StartTime = time.time()
 
-    solution = A_Star(InitialCube, stop, g, h)
+    # The budget keeps the memory bounded on hard scrambles
+    stats = {}
+    solution = A_Star(InitialCube, stop, g, h, MaxNodes=200000, stats=stats)
 
     EndTime = time.time()
     TotalTime = EndTime - StartTime
+    print(f"Expanded: {stats['expanded']}, generated: {stats['generated']}, "
+    f"stale: {stats['stale']}, open: {stats['open']}, closed: {stats['closed']}")
 
     # Results
     if solution is not None:
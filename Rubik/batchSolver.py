@@ -0,0 +1,291 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import contextlib
+import multiprocessing
+from functools import partial
+from itertools import chain
+import queue
+import threading
+from rubikCube import RubikPuzzle, InitialConf, Anytime_IDA_Star, PatternFromRows, ValidatePattern
+from rubikCube import ActionNames, TrajectoryActions, ApplyAction, CompactString
+from rubikCube import CornerPatternDatabase, CompositeHeuristic, MeetInTheMiddle
+from patternStore import PatternDirectory
+from solutionCache import SolutionCache, CacheFile
+from searchStats import SearchStats
+
+
+# The action of each name, to store the solutions in the cache
+ActionByName = {name:action for action, name in ActionNames.items()}
+
+def ReadCubes(source):
+    """
+    Reads the cubes to solve, one at a time
+    :param source: A directory with one .csv file per cube, or a file with
+    several cubes: blocks of 6 rows separated by blank lines
+    :return: generator of tuples (name, rows)
+    """
+    if os.path.isdir(source):
+        for filename in sorted(os.listdir(source)):
+            if filename.lower().endswith('.csv'):
+                with open(os.path.join(source, filename), newline='', encoding='utf-8') as f:
+                    yield filename, [row for row in csv.reader(f) if not BlankRow(row)]
+        return
+    name = os.path.basename(source)
+    with open(source, newline='', encoding='utf-8') as f:
+        rows = []
+        index = 0
+        for row in csv.reader(f):
+            if not BlankRow(row):
+                rows.append(row)
+            elif rows:
+                index += 1
+                yield f"{name}#{index}", rows
+                rows = []
+        if rows:
+            yield f"{name}#{index+1}", rows
+
+def BlankRow(row):
+    """
+    :param row: A row of the CSV
+    :return: true if all its cells are empty
+    """
+    return not any(cell.strip() for cell in row)
+
+def LoadHeuristic(kind, directory):
+    """
+    The pattern databases of the batch, memory-mapped from directory
+    :param kind: 'corners', 'composite' (corners and two edge groups) or
+    'bidirectional' (the composite heuristic and a MeetInTheMiddle table)
+    :param directory: Directory of the files of the databases
+    """
+    if kind == 'bidirectional':
+        # The table from the solved cube is built once for the whole batch
+        return CompositeHeuristic.CornersAndEdges(directory=directory), MeetInTheMiddle()
+    if kind == 'corners':
+        return CornerPatternDatabase(directory=directory)
+    return CompositeHeuristic.CornersAndEdges(directory=directory)
+
+# Heuristic of each process of the pool
+_BatchWorker = {}
+
+def _StartBatchWorker(kind, directory):
+    """
+    Initializer of the processes, the files already exist so the
+    databases are only mapped and all the processes share their pages
+    """
+    with contextlib.redirect_stdout(None):
+        _BatchWorker['heuristic'] = LoadHeuristic(kind, directory)
+
+def CompactPath(configuration, actions):
+    """
+    The states of a solution as compact text, without drawing the cubes
+    :param configuration: The bit-encoded configuration of the cube
+    :param actions: list of the actions of the solution
+    :return: list of strings of 54 letters, from the cube to the goal
+    """
+    path = [CompactString(configuration)]
+    for action in actions:
+        configuration = ApplyAction(configuration, action)
+        path.append(CompactString(configuration))
+    return path
+
+def SolveCube(task, heuristic=None, timeout=None, MaxNodes=None, paths=False):
+    """
+    Solves one cube of the batch
+    :param task: tuple (name, rows) from ReadCubes
+    :param heuristic: The heuristic, the one of the process if not given
+    :param timeout: Seconds of the search of the cube, None without limit
+    :param MaxNodes: Maximum nodes of the search of the cube, for IDA*
+    and for the bidirectional search
+    :param paths: If true the states of the solution are added as compact
+    text, see CompactPath
+    :return: dictionary with the result, ready to write as JSON
+    """
+    name, rows = task
+    result = {"cube": name}
+    try:
+        pattern = PatternFromRows(rows)
+        # An unsolvable cube is rejected before the search
+        ValidatePattern(pattern)
+        cube = RubikPuzzle(pattern=pattern)
+    except ValueError as e:
+        result["error"] = str(e)
+        return result
+    if heuristic == None:
+        heuristic = _BatchWorker['heuristic']
+    if isinstance(heuristic, tuple):
+        heuristic, table = heuristic
+    else:
+        table = None
+    # The nodes are the expanded ones, counted by the stats of the search
+    stats = SearchStats()
+    h = lambda state: heuristic.Heurisic(state)
+    stop = lambda state: state.configuration == InitialConf
+    g = lambda state: state.GetDepth()
+    StartTime = time.perf_counter()
+    # Without stdout the progress of IDA* is not printed
+    with contextlib.redirect_stdout(None):
+        if table != None:
+            search = table.Run(cube, h=h, timeout=timeout, MaxNodes=MaxNodes, stats=stats)
+        else:
+            search = Anytime_IDA_Star(cube, stop, g, h, timeout, MaxNodes, stats=stats)
+    solution = search.solution
+    if search.status != search.Solved:
+        result["status"] = search.status
+        result["bound"] = search.bound
+    result["time"] = round(time.perf_counter() - StartTime, 4)
+    totals = stats.Totals()
+    result["nodes"] = totals["expanded"]
+    result["generated"] = totals["generated"]
+    if solution is None:
+        result["error"] = "No solution found" if "status" not in result else \
+        f"Search stopped ({result['status']})"
+    else:
+        actions = TrajectoryActions(solution)
+        result["length"] = len(solution)-1
+        result["solution"] = [ActionNames[action] for action in actions]
+        if paths:
+            result["path"] = CompactPath(cube.configuration, actions)
+    return result
+
+def CachedCube(task, cache, paths=False):
+    """
+    Looks for a cube of the batch in the cache
+    :param task: tuple (name, rows) from ReadCubes
+    :param cache: The SolutionCache
+    :param paths: If true the states of the solution are added
+    :return: tuple (result, configuration). result is the dictionary of
+    the cube if it was cached, else None. configuration is None if the
+    rows are not a valid cube, SolveCube reports the error
+    """
+    name, rows = task
+    StartTime = time.perf_counter()
+    try:
+        pattern = PatternFromRows(rows)
+        ValidatePattern(pattern)
+    except ValueError:
+        return None, None
+    configuration = RubikPuzzle(pattern=pattern).configuration
+    actions = cache.Get(configuration)
+    if actions == None:
+        return None, configuration
+    result = {"cube": name, "time": round(time.perf_counter() - StartTime, 4), "nodes": 0, "generated": 0,
+    "length": len(actions), "solution": [ActionNames[action] for action in actions],
+    "cached": True}
+    if paths:
+        result["path"] = CompactPath(configuration, actions)
+    return result, configuration
+
+def SolveBatch(source, output, workers=1, kind='composite', directory=PatternDirectory, cache=None,
+timeout=None, MaxNodes=None, paths=False):
+    """
+    Solves all the cubes of a source, the pattern databases are built
+    only once and each result is written as soon as its cube is solved.
+    The cubes are read as they are needed: at most 4 cubes per process
+    are in flight, whatever the size of the batch
+    :param source: Directory or multi-cube file, see ReadCubes
+    :param output: File where the JSON lines are written
+    :param workers: Number of processes
+    :param kind: 'corners', 'composite' or 'bidirectional'
+    :param directory: Directory of the files of the databases
+    :param cache: Optional SolutionCache. A cached cube is written when it
+    is read, the databases are only loaded when the first missing cube
+    is found, and the new solutions are added to the cache
+    :param timeout: Seconds of the search of each cube, None without limit
+    :param MaxNodes: Maximum nodes of the search of each cube
+    :param paths: If true the states of each solution are written as
+    compact text
+    :return: Number of cubes
+    """
+    count = 0
+    # Configuration of each cube being solved, to store its solution
+    configurations = {}
+
+    def Write(result):
+        nonlocal count
+        configuration = configurations.pop(result["cube"], None)
+        if configuration != None and "solution" in result:
+            cache.Put(configuration, [ActionByName[name] for name in result["solution"]])
+        output.write(json.dumps(result, ensure_ascii=False)+'\n')
+        output.flush()
+        count += 1
+
+    def Pending():
+        # The cubes that are not in the cache, the cached ones are written
+        for task in ReadCubes(source):
+            if cache != None:
+                result, configuration = CachedCube(task, cache, paths)
+                if result != None:
+                    Write(result)
+                    continue
+                configurations[task[0]] = configuration
+            yield task
+
+    tasks = Pending()
+    first = next(tasks, None)
+    if first == None:
+        return count
+    tasks = chain([first], tasks)
+
+    # Computes and writes the files if they do not exist yet
+    heuristic = LoadHeuristic(kind, directory)
+    if workers > 1:
+        solve = partial(SolveCube, timeout=timeout, MaxNodes=MaxNodes, paths=paths)
+        # At most 4 cubes per process are in flight, a slot is freed when
+        # the result of a cube is written. The results come back through a
+        # queue, so the reading and the cache stay in this thread
+        slots = threading.BoundedSemaphore(4*workers)
+        finished = queue.Queue()
+        running = 0
+        def Collect():
+            nonlocal running
+            Write(finished.get())
+            running -= 1
+            slots.release()
+        with multiprocessing.Pool(workers, _StartBatchWorker, (kind, directory)) as pool:
+            for task in tasks:
+                while not slots.acquire(blocking=False):
+                    Collect()
+                running += 1
+                pool.apply_async(solve, (task,), callback=finished.put,
+                error_callback=lambda e, name=task[0]: finished.put({"cube": name, "error": str(e)}))
+                # The results that are ready are written before the next read
+                while not finished.empty():
+                    Collect()
+            while running:
+                Collect()
+    else:
+        for task in tasks:
+            Write(SolveCube(task, heuristic, timeout, MaxNodes, paths))
+    return count
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Solves many cubes, one JSON line per cube")
+    parser.add_argument("source", help="directory of .csv files or a file with several cubes")
+    parser.add_argument("-o", "--output", help="file for the results (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+    help="number of processes")
+    parser.add_argument("--heuristic", choices=["corners", "composite", "bidirectional"], default="composite")
+    parser.add_argument("--pdb", default=PatternDirectory, help="directory of the pattern databases")
+    parser.add_argument("--cache", default=CacheFile, help="SQLite file of the solution cache")
+    parser.add_argument("--no-cache", action="store_true", help="solve every cube without the cache")
+    parser.add_argument("-t", "--timeout", type=float, help="seconds of the search of each cube")
+    parser.add_argument("--max-nodes", type=int, help="maximum nodes of the search of each cube")
+    parser.add_argument("--paths", action="store_true",
+    help="write the states of each solution, 54 letters per state")
+    args = parser.parse_args()
+
+    StartTime = time.time()
+    with (open(args.output, 'w', encoding='utf-8') if args.output else
+    contextlib.nullcontext(sys.stdout)) as output:
+        # The messages go to stderr, stdout may hold the results
+        with contextlib.redirect_stdout(sys.stderr), \
+        (contextlib.nullcontext() if args.no_cache else SolutionCache(args.cache)) as cache:
+            count = SolveBatch(args.source, output, args.workers, args.heuristic, args.pdb, cache,
+            args.timeout, args.max_nodes, args.paths)
+    print(f"Solved {count} cubes in {time.time()-StartTime:.2f} seconds", file=sys.stderr)
@@ -0,0 +1,279 @@
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import contextlib
+import multiprocessing
+from rubikCube import RubikPuzzle, InitialConf, IDA_Star, ApplyAction
+from rubikCube import MovePruning, PruningKey
+from rubikCube import PatternBasedHeuristic, CornerPatternDatabase, CompositeHeuristic
+from rubikCube import SymmetricPatternHeuristic
+from rubikCube import MeetInTheMiddle
+from patternStore import PatternDirectory
+from searchStats import SearchStats
+from Test import A_Star
+
+"""
+Reproducible benchmark of the solvers. The scrambles are generated from
+fixed seeds, one list per depth, and every configuration solves all of
+them with a timeout. Each solve runs in a forked process, so a solver
+that does not finish is killed without stopping the suite, and the
+databases built before the fork are shared by all the solves.
+
+The results are written as CSV or JSON, and can be compared against a
+baseline file of a previous run to catch regressions: a changed length,
+more nodes, a solve that now times out or a time over the tolerance.
+"""
+
+# Fields of each result, in the order of the CSV
+Fields = ["config", "depth", "index", "seed", "status", "length", "nodes", "time"]
+
+def SeededScramble(depth, SeedValue):
+    """
+    Scramble of depth actions without redundant sequences, the same
+    for the same seed on every machine
+    :param depth: Number of actions
+    :param SeedValue: Seed of the generator
+    :return: The scrambled RubikPuzzle
+    """
+    generator = random.Random(SeedValue)
+    configuration = InitialConf
+    last = None
+    for _ in range(depth):
+        action = generator.choice(MovePruning[last])
+        configuration = ApplyAction(configuration, action)
+        last = PruningKey(last, action)
+    cube = RubikPuzzle()
+    cube.configuration = configuration
+    return cube
+
+def IDASolver(heuristic):
+    """
+    :param heuristic: Object with Heurisic(puzzle)
+    :return: function cube -> (solution, nodes) of the in-place IDA*
+    """
+    def solve(cube):
+        # The nodes are the "generated" counter of the search
+        stats = SearchStats()
+        stop = lambda state: state.configuration == InitialConf
+        g = lambda state: state.GetDepth()
+        h = lambda state: heuristic.Heurisic(state)
+        solution = IDA_Star(cube, stop, g, h, inplace=True, stats=stats)
+        return solution, stats.Totals()["generated"]
+    return solve
+
+def AStarSolver(heuristic):
+    """
+    :param heuristic: Object with Heurisic(puzzle)
+    :return: function cube -> (solution, nodes) of the A* of Test.py
+    """
+    def solve(cube):
+        stats = {}
+        stop = lambda state: state.configuration == InitialConf
+        g = lambda state: state.GetDepth()
+        h = lambda state: heuristic.Heurisic(state)
+        return A_Star(cube, stop, g, h, stats=stats), stats["generated"]
+    return solve
+
+def BidirectionalSolver(directory):
+    """
+    :param directory: Directory of the files of the databases
+    :return: function cube -> (solution, nodes) of MeetInTheMiddle with
+    the composite heuristic
+    """
+    heuristic = CompositeHeuristic.CornersAndEdges(directory=directory)
+    table = MeetInTheMiddle()
+    def solve(cube):
+        # One iteration holds all the nodes of the forward search
+        stats = SearchStats()
+        stats.StartIteration(None)
+        solution = table.Solve(cube, h=stats.CountHeuristic(heuristic.Heurisic))
+        stats.EndIteration(solution != None)
+        return solution, stats.Totals()["generated"]
+    return solve
+
+# Configurations of the suite: name -> function (directory) -> solver
+Configurations = {
+    "astar-dict5": lambda directory: AStarSolver(PatternBasedHeuristic(depth=5)),
+    "ida-dict5": lambda directory: IDASolver(PatternBasedHeuristic(depth=5)),
+    "ida-dict6": lambda directory: IDASolver(PatternBasedHeuristic(depth=6)),
+    "ida-sym7": lambda directory: IDASolver(SymmetricPatternHeuristic(depth=7)),
+    "ida-corners": lambda directory: IDASolver(CornerPatternDatabase(directory=directory)),
+    "ida-composite": lambda directory: IDASolver(CompositeHeuristic.CornersAndEdges(directory=directory)),
+    "bidirectional": BidirectionalSolver,
+}
+
+def _RunSolve(solve, cube, connection):
+    """
+    Body of the forked process of a solve, sends (solution length, nodes)
+    """
+    with contextlib.redirect_stdout(None):
+        solution, nodes = solve(cube)
+    if solution == None or solution[-1].configuration != InitialConf:
+        connection.send((None, nodes))
+    else:
+        connection.send((len(solution)-1, nodes))
+    connection.close()
+
+def TimedSolve(solve, cube, timeout):
+    """
+    Solves a cube in a forked process
+    :param solve: function cube -> (solution, nodes)
+    :param cube: The scrambled cube
+    :param timeout: Seconds before the process is killed
+    :return: tuple (status, length, nodes, time), status is 'solved',
+    'timeout' or 'failed'
+    """
+    context = multiprocessing.get_context('fork')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_RunSolve, args=(solve, cube, sender))
+    StartTime = time.perf_counter()
+    process.start()
+    sender.close()
+    ready = receiver.poll(timeout)
+    elapsed = time.perf_counter() - StartTime
+    if not ready:
+        process.kill()
+        process.join()
+        return 'timeout', None, None, round(elapsed, 4)
+    try:
+        length, nodes = receiver.recv()
+    except EOFError:
+        # The process ended without a result (an exception)
+        length, nodes = None, None
+    process.join()
+    status = 'failed' if length == None else 'solved'
+    return status, length, nodes, round(elapsed, 4)
+
+def RunSuite(configurations, depths, count, timeout, directory=PatternDirectory, SeedValue=0):
+    """
+    Runs every configuration on the seeded scrambles
+    :param configurations: Names of Configurations
+    :param depths: Depths of the scrambles
+    :param count: Scrambles of each depth
+    :param timeout: Seconds of each solve
+    :param directory: Directory of the files of the databases
+    :param SeedValue: Base seed, the scramble i of depth d uses SeedValue+1000*d+i
+    :return: list of result dictionaries with the keys of Fields
+    """
+    results = []
+    for name in configurations:
+        StartTime = time.perf_counter()
+        with contextlib.redirect_stdout(None):
+            solve = Configurations[name](directory)
+        print(f"{name}: ready in {time.perf_counter()-StartTime:.2f} seconds", file=sys.stderr)
+        for depth in depths:
+            for index in range(count):
+                seed = SeedValue+1000*depth+index
+                status, length, nodes, elapsed = TimedSolve(solve,
+                SeededScramble(depth, seed), timeout)
+                results.append(dict(zip(Fields, (name, depth, index, seed,
+                status, length, nodes, elapsed))))
+                print(f"  depth {depth:>2} #{index}: {status:<7} length={length} "
+                f"nodes={nodes} time={elapsed:.3f}s", file=sys.stderr)
+    return results
+
+def WriteResults(results, filename):
+    """
+    Writes the results, as CSV if filename ends in .csv, as JSON otherwise
+    """
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        if filename.lower().endswith('.csv'):
+            writer = csv.DictWriter(f, fieldnames=Fields)
+            writer.writeheader()
+            writer.writerows(results)
+        else:
+            json.dump(results, f, indent=1)
+            f.write('\n')
+
+def ReadResults(filename):
+    """
+    Reads results written by WriteResults
+    :return: list of result dictionaries
+    """
+    with open(filename, newline='', encoding='utf-8') as f:
+        if not filename.lower().endswith('.csv'):
+            return json.load(f)
+        results = []
+        for row in csv.DictReader(f):
+            for field in ("depth", "index", "seed", "length", "nodes"):
+                row[field] = int(row[field]) if row[field] else None
+            row["time"] = float(row["time"])
+            results.append(row)
+        return results
+
+def CompareBaseline(results, baseline, tolerance=0.25, slack=0.05):
+    """
+    Finds the regressions against a previous run
+    :param results: Results of this run
+    :param baseline: Results of the baseline run
+    :param tolerance: Relative increase of the time that is a regression
+    :param slack: Seconds of noise ignored in the time
+    :return: list of messages, empty if there is no regression
+    """
+    previous = {(r["config"], r["depth"], r["seed"]):r for r in baseline}
+    regressions = []
+    for result in results:
+        key = (result["config"], result["depth"], result["seed"])
+        if key not in previous:
+            continue
+        before = previous[key]
+        label = f"{key[0]} depth {key[1]} seed {key[2]}"
+        if before["status"] == 'solved' and result["status"] != 'solved':
+            regressions.append(f"{label}: {result['status']}, it was solved")
+        elif result["status"] == 'solved' and before["status"] == 'solved':
+            if result["length"] != before["length"]:
+                regressions.append(f"{label}: length {result['length']}, it was {before['length']}")
+            if result["nodes"] > before["nodes"]:
+                regressions.append(f"{label}: {result['nodes']} nodes, it was {before['nodes']}")
+            if result["time"] > before["time"]*(1+tolerance)+slack:
+                regressions.append(f"{label}: {result['time']:.3f}s, it was {before['time']:.3f}s")
+    return regressions
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Seeded benchmark of the Rubik solvers")
+    parser.add_argument("-c", "--config", nargs="+", choices=list(Configurations),
+    default=["ida-dict5", "ida-corners", "ida-composite"], help="solver configurations")
+    parser.add_argument("-d", "--depths", type=int, nargs=2, default=[5, 14],
+    metavar=("FIRST", "LAST"), help="depths of the scrambles")
+    parser.add_argument("-n", "--count", type=int, default=3, help="scrambles of each depth")
+    parser.add_argument("-t", "--timeout", type=float, default=60, help="seconds of each solve")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="base seed of the scrambles")
+    parser.add_argument("-o", "--output", help="file for the results, .csv or .json")
+    parser.add_argument("-b", "--baseline", help="results of a previous run to compare")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+    help="relative increase of the time reported as a regression")
+    parser.add_argument("--pdb", default=PatternDirectory, help="directory of the pattern databases")
+    args = parser.parse_args()
+
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        print("The benchmark suite needs fork to run each solve with a timeout")
+        sys.exit(1)
+    depths = range(args.depths[0], args.depths[1]+1)
+    results = RunSuite(args.config, depths, args.count, args.timeout, args.pdb, args.seed)
+    if args.output:
+        WriteResults(results, args.output)
+
+    print(f"{'config':<14} {'depth':>5} {'solved':>6} {'length':>6} {'nodes':>10} {'time':>9}")
+    for name in args.config:
+        for depth in depths:
+            rows = [r for r in results if r["config"] == name and r["depth"] == depth]
+            solved = [r for r in rows if r["status"] == 'solved']
+            if solved:
+                print(f"{name:<14} {depth:>5} {len(solved):>3}/{len(rows):<2} "
+                f"{sum(r['length'] for r in solved)/len(solved):>6.1f} "
+                f"{sum(r['nodes'] for r in solved)//len(solved):>10} "
+                f"{sum(r['time'] for r in solved)/len(solved):>8.3f}s")
+            else:
+                print(f"{name:<14} {depth:>5} {0:>3}/{len(rows):<2}")
+
+    if args.baseline:
+        regressions = CompareBaseline(results, ReadResults(args.baseline), args.tolerance)
+        for message in regressions:
+            print(f"Regression: {message}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline")
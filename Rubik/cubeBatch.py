@@ -0,0 +1,214 @@
+import numpy as np
+from rubikCube import RubikPuzzle, ActionList, MoveTable, InitialConf, code
+from rubikCube import PatternSymmetries, SymmetrySource
+
+"""
+Many cubes at once. A batch is a NumPy array of N x 54 uint8, the color
+of every facelet of every cube, in the order of the bits of the
+configuration (facelet i is bits 3i to 3i+2). A move is the same
+facelet permutation for all the cubes, so it is a single fancy-index
+gather over the columns:
+
+    moved = colors[:, permutation]
+
+with the permutation of MoveTable. The keys of a pattern are the columns
+of its facelets viewed as raw bytes, they can be sorted, compared and
+deduplicated by NumPy without Python loops. The raw keys are those of
+PatternBasedHeuristic; the keys of SymmetricPatternHeuristic are the
+smallest over the conjugates, given by CanonicalRows.
+"""
+
+# Gather of each action, permutation[i] is the facelet that lands on i
+MovePermutations = np.array([MoveTable[action][0] for action in ActionList], dtype=np.intp)
+# Bytes of a configuration, 162 bits
+ConfigurationBytes = 21
+
+def ApplyMove(colors, action):
+    """
+    Applies the same action to all the cubes of a batch
+    :param colors: Array N x 54 of colors
+    :param action: Action tuple (axis, row, direction)
+    :return: New array N x 54
+    """
+    return colors[:, MovePermutations[ActionList.index(action)]]
+
+def ExpandBatch(colors):
+    """
+    All the children of all the cubes of a batch
+    :param colors: Array N x 54 of colors
+    :return: Array 12N x 54, the 12 children of each cube in the order of
+    ActionList
+    """
+    return colors[:, MovePermutations].reshape(-1, 54)
+
+def PatternColumns(pattern):
+    """
+    :param pattern: The letters of a pattern
+    :return: The columns of its facelets, in the order of the letters
+    """
+    return np.array([code[letter][0]//3 for letter in pattern], dtype=np.intp)
+
+def RowKeys(colors, columns=None):
+    """
+    One key per cube: the bytes of the colors of some facelets
+    :param colors: Array N x 54 of colors
+    :param columns: Columns of the facelets, all the facelets if None
+    :return: Array of N keys (void dtype), hashable with bytes(key)
+    """
+    if columns is not None:
+        colors = colors[:, columns]
+    colors = np.ascontiguousarray(colors)
+    return colors.view(f'V{colors.shape[1]}').ravel()
+
+def CanonicalRows(colors, pattern, symmetries=None):
+    """
+    The representative of the symmetry class of the pattern of each cube,
+    the same bytes as SymmetricPatternHeuristic.Canonical: the smallest
+    of the colors of its conjugates
+    :param colors: Array N x 54 of colors
+    :param pattern: The letters of the pattern
+    :param symmetries: The symmetries, UDSymmetries if not given
+    :return: Array N x len(pattern) of colors
+    """
+    colors = colors[:, PatternColumns(pattern)]
+    rows = np.arange(colors.shape[0])
+    best = None
+    for symmetry in PatternSymmetries(pattern, symmetries):
+        table = np.array(symmetry[1], dtype=np.uint8)
+        candidate = table[colors[:, SymmetrySource(symmetry, pattern)]]
+        if best is None:
+            best = candidate
+            continue
+        # Lexicographic comparison, at the first column that differs
+        differ = candidate != best
+        first = differ.argmax(axis=1)
+        smaller = differ[rows, first] & (candidate[rows, first] < best[rows, first])
+        best[smaller] = candidate[smaller]
+    return best
+
+def UniqueRows(colors):
+    """
+    :param colors: Array N x 54 of colors
+    :return: The distinct cubes of the batch, sorted by their key
+    """
+    _, index = np.unique(RowKeys(colors), return_index=True)
+    return colors[index]
+
+def ColorsFromConfigurations(configurations):
+    """
+    :param configurations: list of bit-encoded configurations
+    :return: Array N x 54 of colors
+    """
+    data = b''.join(c.to_bytes(ConfigurationBytes, 'little') for c in configurations)
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8).reshape(-1, ConfigurationBytes),
+    axis=1, bitorder='little')[:, :162].reshape(-1, 54, 3)
+    return (bits[:,:,0] | (bits[:,:,1]<<1) | (bits[:,:,2]<<2)).astype(np.uint8)
+
+def ConfigurationsFromColors(colors):
+    """
+    :param colors: Array N x 54 of colors
+    :return: list of the bit-encoded configurations
+    """
+    bits = np.zeros((colors.shape[0], ConfigurationBytes*8), dtype=np.uint8)
+    for k in range(3):
+        bits[:, k:162:3] = (colors>>k)&1
+    data = np.packbits(bits, axis=1, bitorder='little')
+    return [int.from_bytes(row.tobytes(), 'little') for row in data]
+
+class CubeBatch:
+    """
+    Container of N cubes as an N x 54 array of colors
+    """
+    def __init__(self, colors):
+        """
+        :param colors: Array N x 54 of colors
+        """
+        self.colors = np.asarray(colors, dtype=np.uint8)
+
+    @staticmethod
+    def Solved(n):
+        """
+        :param n: Number of cubes
+        :return: A batch of n solved cubes
+        """
+        return CubeBatch(np.repeat(ColorsFromConfigurations([InitialConf]), n, axis=0))
+
+    @staticmethod
+    def FromPuzzles(puzzles):
+        """
+        :param puzzles: list of RubikPuzzle
+        :return: The batch with their configurations
+        """
+        return CubeBatch(ColorsFromConfigurations([p.configuration for p in puzzles]))
+
+    def Configurations(self):
+        """
+        :return: list of the bit-encoded configurations
+        """
+        return ConfigurationsFromColors(self.colors)
+
+    def Puzzles(self):
+        """
+        :return: list of RubikPuzzle, one per cube
+        """
+        puzzles = []
+        for configuration in self.Configurations():
+            puzzle = RubikPuzzle()
+            puzzle.configuration = configuration
+            puzzles.append(puzzle)
+        return puzzles
+
+    def apply(self, action):
+        """
+        Apply the same action to all the cubes
+        """
+        self.colors = ApplyMove(self.colors, action)
+
+    def applyEach(self, actions):
+        """
+        Apply a different action to each cube
+        :param actions: Array of N indices of ActionList
+        """
+        self.colors = np.take_along_axis(self.colors,
+        MovePermutations[np.asarray(actions)], axis=1)
+
+    def Expand(self):
+        """
+        :return: CubeBatch with the 12 children of every cube
+        """
+        return CubeBatch(ExpandBatch(self.colors))
+
+    def Keys(self, pattern=None, symmetries=None):
+        """
+        :param pattern: The letters of a pattern, the whole cube if None
+        :param symmetries: If given, the keys are the canonical ones of
+        SymmetricPatternHeuristic with these symmetries (UDSymmetries),
+        a pattern is needed
+        :return: Array of one key per cube
+        """
+        if symmetries != None:
+            return RowKeys(CanonicalRows(self.colors, pattern, symmetries))
+        return RowKeys(self.colors, None if pattern == None else PatternColumns(pattern))
+
+    def __len__(self):
+        return self.colors.shape[0]
+
+def BreadthFirstLayers(depth):
+    """
+    Breadth-first search from the solved cube on whole batches: each
+    layer is expanded at once and the children already seen are removed.
+    Every action changes the parity of the cube, so the children of the
+    layer d are in the layer d-1 or d+1 and only the previous layer has
+    to be checked
+    :param depth: Number of layers
+    :return: list with the number of new configurations of each layer
+    """
+    previous = CubeBatch.Solved(0).colors
+    layer = CubeBatch.Solved(1).colors
+    counts = [1]
+    for _ in range(depth):
+        children = UniqueRows(ExpandBatch(layer))
+        new = ~np.isin(RowKeys(children), RowKeys(previous))
+        previous, layer = layer, children[new]
+        counts.append(len(layer))
+    return counts
@@ -0,0 +1,187 @@
+from operator import itemgetter, add
+from itertools import permutations, product
+from rubikCube import RubikPuzzle, ActionList, InitialConf, code, faceLetters
+from rubikCube import CornerBits, EdgeBits, CornerByColors, EdgeByColors
+from rubikCube import CornerColors, EdgeColors, CornerMoveTable, EdgeMoveTable
+from rubikCube import CornerOrientations
+
+"""
+Cube at the level of the pieces. The state is a bytes object of 20 slots,
+the 8 corners (URF, UFL, ULB, UBR, DFR, DLF, DBL, DRB) and then the 12
+edges (UR, UF, UL, UB, DR, DF, DL, DB, FR, FL, BL, BR):
+
+    corner slot: piece*3+orientation (0 to 23)
+    edge slot:   piece*2+orientation (0 to 23)
+
+An action takes each slot from another slot (a gather) and adds the
+orientation of the turn, both are table lookups done by itemgetter, map
+and bytes, without a Python loop.
+"""
+
+# The facelets that never move, the centers
+CenterBits = [code[letters[4]][0] for letters in faceLetters]
+
+# Turn table: the entry turn*24+value is the value after adding the
+# orientation turn. Corners use the first 72 entries, edges the next 48
+TurnTable = bytes([piece*3+(twist+turn)%3 for turn in range(3)
+for piece in range(8) for twist in range(3)]+
+[piece*2+(flip+turn)%2 for turn in range(2)
+for piece in range(12) for flip in range(2)])
+
+def CompileCubieMove(action):
+    """
+    Compiles an action for the bytes state
+    :param action: Action tuple (axis, row, direction)
+    :return: tuple (gather, offsets), the itemgetter of the source slots
+    and the offset of each slot in TurnTable
+    """
+    corners, twists = CornerMoveTable[action]
+    edges, flips = EdgeMoveTable[action]
+    gather = itemgetter(*(list(corners)+[8+e for e in edges]))
+    offsets = tuple([twist*24 for twist in twists]+[72+flip*24 for flip in flips])
+    return gather, offsets
+
+CubieMoveTable = {action:CompileCubieMove(action) for action in ActionList}
+
+def ApplyCubieAction(state, action):
+    """
+    Applies an action to a bytes state
+    :param state: The state, 20 bytes
+    :param action: Action tuple (axis, row, direction)
+    :return: The new state
+    """
+    gather, offsets = CubieMoveTable[action]
+    return bytes(map(TurnTable.__getitem__, map(add, gather(state), offsets)))
+
+# Tables of bytes.translate, the piece and the orientation of a corner value
+CornerPieceTable = bytes([value//3 for value in range(24)]+[0]*232)
+CornerTwistTable = bytes([value%3 for value in range(24)]+[0]*232)
+
+# Lehmer rank of every corner permutation, permutations() is in
+# lexicographic order, and the index of the orientations of 7 corners
+CornerRanks = {bytes(permutation):rank
+for rank, permutation in enumerate(permutations(range(8)))}
+CornerTwistIndex = {bytes(twists):index
+for index, twists in enumerate(product(range(3), repeat=7))}
+
+SolvedState = bytes([piece*3 for piece in range(8)]+[piece*2 for piece in range(12)])
+
+class CubieCube:
+    """
+    3 x 3 Rubik's Cube as pieces: permutation and orientation of the
+    corners and the edges. It converts to and from the facelet
+    configuration of RubikPuzzle
+    """
+    def __init__(self, state=None):
+        """
+        Creates the cube
+        :param state: bytes with the 20 slots, the solved cube if not given
+        """
+        self.state = SolvedState if state == None else bytes(state)
+
+    @staticmethod
+    def FromConfiguration(configuration):
+        """
+        Reads the pieces of a bit-encoded configuration
+        :param configuration: The bit-encoded configuration of RubikPuzzle
+        :return: The CubieCube
+        """
+        state = []
+        for a, b, c in CornerBits:
+            piece, twist = CornerByColors[((configuration>>a)&7,
+            (configuration>>b)&7, (configuration>>c)&7)]
+            state.append(piece*3+twist)
+        for a, b in EdgeBits:
+            piece, flip = EdgeByColors[((configuration>>a)&7, (configuration>>b)&7)]
+            state.append(piece*2+flip)
+        return CubieCube(state)
+
+    @staticmethod
+    def FromPattern(pattern):
+        """
+        :param pattern: A dictionary {letter:color code}, as LoadCubeCSV returns
+        :return: The CubieCube
+        """
+        return CubieCube.FromConfiguration(RubikPuzzle(pattern=pattern).configuration)
+
+    def Configuration(self):
+        """
+        :return: The bit-encoded configuration of RubikPuzzle
+        """
+        configuration = 0
+        for bits in CenterBits:
+            configuration |= ((InitialConf>>bits)&7)<<bits
+        for slot, bits in enumerate(CornerBits):
+            piece, twist = divmod(self.state[slot], 3)
+            for k, position in enumerate(bits):
+                configuration |= CornerColors[piece][(k-twist)%3]<<position
+        for slot, bits in enumerate(EdgeBits):
+            piece, flip = divmod(self.state[8+slot], 2)
+            for k, position in enumerate(bits):
+                configuration |= EdgeColors[piece][(k+flip)%2]<<position
+        return configuration
+
+    def Puzzle(self):
+        """
+        :return: A RubikPuzzle with the same configuration
+        """
+        puzzle = RubikPuzzle()
+        puzzle.configuration = self.Configuration()
+        return puzzle
+
+    def apply(self,action):
+        """
+        Apply the action to the pieces
+        """
+        self.state = ApplyCubieAction(self.state, action)
+
+    def CornerPermutation(self):
+        return [value//3 for value in self.state[:8]]
+
+    def CornerOrientation(self):
+        return [value%3 for value in self.state[:8]]
+
+    def EdgePermutation(self):
+        return [value//2 for value in self.state[8:]]
+
+    def EdgeOrientation(self):
+        return [value%2 for value in self.state[8:]]
+
+    def CornerIndex(self):
+        """
+        Index of the corners in CornerPatternDatabase, the same value as
+        rubikCube.CornerIndex without reading the colors
+        """
+        return CornerRanks[self.state[:8].translate(CornerPieceTable)]*CornerOrientations+ \
+        CornerTwistIndex[self.state[:7].translate(CornerTwistTable)]
+
+    def EdgeIndex(self, database):
+        """
+        Index of the edges in an EdgePatternDatabase, the same value as
+        database.Index without reading the colors
+        :param database: The EdgePatternDatabase
+        """
+        k = len(database.pieces)
+        slots = [0]*k
+        flips = 0
+        for i, value in enumerate(self.state[8:]):
+            j = database.member[value>>1]
+            if j >= 0:
+                slots[j] = i
+                flips |= (value&1)<<(k-1-j)
+        rank = 0
+        used = 0
+        for i, slot in enumerate(slots):
+            rank = rank*(12-i)+slot-(used&((1<<slot)-1)).bit_count()
+            used |= 1<<slot
+        return (rank<<k)|flips
+
+    def __eq__(self,other):
+        return isinstance(other, self.__class__) and self.state == other.state
+
+    def __hash__(self):
+        return hash(self.state)
+
+    def __repr__(self):
+        return f"CubieCube(cp={self.CornerPermutation()}, co={self.CornerOrientation()}, " \
+        f"ep={self.EdgePermutation()}, eo={self.EdgeOrientation()})"
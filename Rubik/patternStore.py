@@ -0,0 +1,101 @@
+import os
+import mmap
+import struct
+import hashlib
+import tempfile
+
+"""
+Pattern databases on disk. Each file holds a single table, keyed by the
+pattern string and the depth of the search that computed it:
+
+    magic      4 bytes, b'RPDB'
+    version    uint16
+    depth      int16, requested depth (-1 for a complete database)
+    MaxDepth   int16, deepest value stored in the table
+    length     uint16, bytes of the pattern in UTF-8
+    size       uint64, bytes of the table
+    pattern    UTF-8, padded with zeros to a multiple of 16 bytes
+    table      size bytes
+
+The table is opened with mmap, so loading is instant and all the
+solver processes that open the same file share its pages.
+"""
+
+Magic = b'RPDB'
+Version = 1
+Header = struct.Struct('<4sHhhHQ')
+
+# Default directory of the files, next to the scripts
+PatternDirectory = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pdb')
+
+def PatternFileName(directory, name, pattern, depth):
+    """
+    Name of the file for a pattern database
+    :param directory: The directory of the files
+    :param name: Kind of database, for example 'corners'
+    :param pattern: The pattern string of the database
+    :param depth: The depth of the search, None for a complete database
+    :return: path to the file
+    """
+    digest = hashlib.sha1(pattern.encode('utf-8')).hexdigest()[:12]
+    level = 'full' if depth == None else f'd{depth}'
+    return os.path.join(directory, f'{name}-{digest}-{level}-v{Version}.pdb')
+
+def SavePatternTable(filename, pattern, depth, MaxDepth, table):
+    """
+    Writes a table atomically: it goes to a temporary file in the same
+    directory, which is renamed at the end, so no reader sees it half done
+    :param filename: Path to the file
+    :param pattern: The pattern string of the database
+    :param depth: The depth of the search, None for a complete database
+    :param MaxDepth: The deepest value stored in the table
+    :param table: bytes-like object with the table
+    """
+    directory = os.path.dirname(filename) or '.'
+    os.makedirs(directory, exist_ok=True)
+    name = pattern.encode('utf-8')
+    padding = (-(Header.size+len(name)))%16
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as f:
+            f.write(Header.pack(Magic, Version, -1 if depth == None else depth,
+            MaxDepth, len(name), len(table)))
+            f.write(name+b'\0'*padding)
+            f.write(table)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file private, the database is shared
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, filename)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+def LoadPatternTable(filename, pattern, depth):
+    """
+    Opens a table with mmap
+    :param filename: Path to the file
+    :param pattern: The pattern string expected in the file
+    :param depth: The depth expected in the file, None for a complete database
+    :return: tuple (MaxDepth, table) where table is a read-only memoryview,
+    or None if the file is missing or belongs to another pattern or version
+    """
+    try:
+        with open(filename, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        # ValueError: the file is empty
+        return None
+    if len(mapped) < Header.size:
+        mapped.close()
+        return None
+    magic, version, level, MaxDepth, length, size = Header.unpack_from(mapped)
+    name = pattern.encode('utf-8')
+    offset = Header.size+length+(-(Header.size+length))%16
+    if magic != Magic or version != Version or \
+    level != (-1 if depth == None else depth) or \
+    mapped[Header.size:Header.size+length] != name or \
+    len(mapped) != offset+size:
+        mapped.close()
+        return None
+    return MaxDepth, memoryview(mapped)[offset:offset+size]
@@ -1,13 +1,19 @@
 import time
-from functools import reduce
+from functools import reduce, lru_cache
+from operator import itemgetter
 from collections import deque
 import heapq # Still used by PatternBasedHeuristic (if you keep it)
 from random import seed, choice # 'choice' is used by the unused 'Shuffle'
 from termcolor import colored
-from itertools import product
+from itertools import product, permutations
+import numpy as np
 import csv
 import sys
 import os
+import multiprocessing
+from patternStore import PatternDirectory, PatternFileName
+from patternStore import SavePatternTable, LoadPatternTable
+from solutionCache import SolutionCache, CacheFile
 
 
 def Trajectory(end):
@@ -22,6 +28,27 @@ def Trajectory(end):
     sequence.reverse()
     return list(sequence)
 
+def TrajectoryFromActions(origin, path):
+    """
+    Rebuilds the trajectory of states from a list of actions
+    :param origin: The initial state
+    :param path: list of action tuples (axis, row, direction) applied in order
+    :return: list of states, from the origin to the final state
+    """
+    end = origin
+    for action in path:
+        end = RubikPuzzle(end, action, end.depth+1)
+    return Trajectory(end)
+
+def TrajectoryActions(trajectory):
+    """
+    The actions applied between the states of a trajectory
+    :param trajectory: list of states, as returned by Trajectory
+    :return: list of action tuples (axis, row, direction)
+    """
+    # The key of the half turn is (axis, row, 2), its action is clockwise
+    return [(state.last[0], state.last[1], state.last[2]%2) for state in trajectory[1:]]
+
 # --- (Start of IDAStar Class Implementation) ---
 
 class IDAStar:
@@ -32,7 +59,7 @@ class IDAStar:
     """
 
     @staticmethod
-    def _search_recursive(node, stop, g, h, bound):
+    def _search_recursive(node, stop, g, h, bound, pruning=True):
         """
         Internal recursive DFS function for IDA*.
         This function performs a depth-first search with a cost bound.
@@ -42,6 +69,7 @@ class IDAStar:
         :param g: Cost function g(s) (lambda)
         :param h: Heuristic function h(s) (lambda)
         :param bound: The current f-cost limit for this iteration
+        :param pruning: If true the redundant sequences are pruned
         :return: A tuple (found, value)
         - (True, solution_node) if the goal is found.
         - (False, next_bound) if not found. 'next_bound' is the minimum
@@ -62,9 +90,9 @@ class IDAStar:
         min_next_bound = float('inf') 
 
         # 3. Expansion / Recursion:
-        for successor in node.Expand():
+        for successor in node.Expand(pruning):
             
-            found, value = IDAStar._search_recursive(successor, stop, g, h, bound)
+            found, value = IDAStar._search_recursive(successor, stop, g, h, bound, pruning)
             
             if found:
                 return (True, value)
@@ -75,7 +103,155 @@ class IDAStar:
         return (False, min_next_bound)
 
     @staticmethod
-    def search(origin, stop, g, h):
+    def _search_in_place(node, path, last, stop, g, h, bound, table, cancel=None,
+    transpositions=None):
+        """
+        Internal recursive DFS function for the in-place IDA* mode.
+        Only one cube is used during the whole search, every action is
+        applied on it (make) and undone (unmake) when its subtree is done,
+        so no new node is created.
+
+        :param node: The only state (RubikPuzzle), modified in place
+        :param path: list of the actions applied from the origin to node
+        :param last: The key of the last move in the pruning table
+        :param stop: Stop function (lambda)
+        :param g: Cost function g(s) (lambda)
+        :param h: Heuristic function h(s) (lambda)
+        :param bound: The current f-cost limit for this iteration
+        :param table: Pruning table, the actions allowed after each move
+        :param cancel: Shared flag of the parallel search, the subtree is
+        abandoned when another process finds the goal
+        :param transpositions: Optional TranspositionTable, the subtrees
+        already searched with the same or a larger budget are skipped
+        :return: A tuple (found, value)
+        - (True, path) if the goal is found, with the actions of the solution.
+        - (False, next_bound) if not found.
+        """
+        if cancel != None and cancel.value:
+            return (False, float('inf'))
+
+        cost = g(node)
+        f_cost = cost + h(node)
+
+        # 1. Pruning Check:
+        if f_cost > bound:
+            return (False, f_cost)
+
+        # 2. Goal Check:
+        if stop(node):
+            return (True, path)
+
+        min_next_bound = float('inf')
+        configuration = node.configuration
+
+        if transpositions != None:
+            # The successors depend on the last move, it is part of the key
+            key = (configuration<<5)|PruningKeyIndex[last]
+            excess = transpositions.Probe(key, bound-cost)
+            if excess != None:
+                return (False, cost+excess)
+
+        # 3. Make / Recursion / Unmake:
+        for action in table[last]:
+            node.configuration = ApplyAction(configuration, action)
+            node.depth += 1
+            path.append(action)
+
+            found, value = IDAStar._search_in_place(node, path,
+            PruningKey(last, action), stop, g, h, bound, table, cancel, transpositions)
+
+            if found:
+                return (True, value)
+
+            path.pop()
+            node.depth -= 1
+            node.configuration = configuration
+
+            if value < min_next_bound:
+                min_next_bound = value
+
+        if transpositions != None:
+            transpositions.Store(key, bound-cost, min_next_bound-cost)
+        return (False, min_next_bound)
+
+    @staticmethod
+    def _split_in_place(node, path, last, stop, g, h, bound, table, split, tasks):
+        """
+        Walks the first levels of the tree like _search_in_place, but the
+        nodes at depth split are not searched, they are added to tasks
+        for the processes of the parallel search
+
+        :param split: Depth of the subtrees given to the processes
+        :param tasks: list where the tuples (path, last) are added
+        :return: A tuple (found, value) as _search_in_place, value only
+        counts the nodes above the split
+        """
+        f_cost = g(node) + h(node)
+
+        if f_cost > bound:
+            return (False, f_cost)
+
+        if stop(node):
+            return (True, list(path))
+
+        if len(path) == split:
+            tasks.append((tuple(path), last))
+            return (False, float('inf'))
+
+        min_next_bound = float('inf')
+        configuration = node.configuration
+
+        for action in table[last]:
+            node.configuration = ApplyAction(configuration, action)
+            node.depth += 1
+            path.append(action)
+
+            found, value = IDAStar._split_in_place(node, path,
+            PruningKey(last, action), stop, g, h, bound, table, split, tasks)
+
+            path.pop()
+            node.depth -= 1
+            node.configuration = configuration
+
+            if found:
+                return (True, value)
+
+            if value < min_next_bound:
+                min_next_bound = value
+
+        return (False, min_next_bound)
+
+    @staticmethod
+    def _search_parallel(pool, cancel, node, stop, g, h, bound, table, split):
+        """
+        One iteration of the parallel IDA*. The subtrees below depth split
+        are searched by the processes of the pool, when one of them finds
+        the goal the others are cancelled. All the solutions inside a
+        bound have the same length, so it is still optimal
+
+        :param pool: Pool started with _StartSearchWorker
+        :param cancel: The shared flag of the workers
+        :param node: The working copy of the origin
+        :param split: Depth of the subtrees given to the processes
+        :return: A tuple (found, value) as _search_in_place
+        """
+        tasks = []
+        found, value = IDAStar._split_in_place(node, [], node.last, stop, g, h,
+        bound, table, split, tasks)
+        if found:
+            return (True, value)
+        cancel.value = 0
+        for found, result in pool.imap_unordered(_SearchSubtree,
+        [(path, last, bound) for path, last in tasks]):
+            if found:
+                return (True, result)
+            if result < value:
+                value = result
+        return (False, value)
+
+    @staticmethod
+    def search(origin, stop, g, h, inplace=False, pruning=True, workers=1, split=2, stats=None,
+    transpositions=None):
         """
         Main public method to start the IDA* search.
         This function contains the iterative loop that increases the cost bound.
@@ -84,36 +260,344 @@ class IDAStar:
         :param stop: Stop funtion, true for the goal state
         :param g: Cumulative cost function (node.GetDepth)
         :param h: Heuristic function (PDB lookup)
+        :param inplace: If true, the search applies and undoes the actions
+        on a single cube instead of creating a node for each successor
+        :param pruning: If true the redundant sequences of actions are
+        pruned (MovePruning), if false only the predecessor is removed
+        :param workers: Number of processes, more than one searches the
+        subtrees of each iteration in parallel (always in place). The
+        processes are forked, so they share the pattern databases and
+        stop, g and h can be lambdas
+        :param split: Depth of the subtrees given to the processes
+        :param stats: Optional SearchStats, the counters of each bound.
+        With several workers only the nodes above the split are counted
+        :param transpositions: Optional TranspositionTable of the search in
+        a single process (always in place), ignored with several workers
+        :return: The trajectory of the solution, None if there is none
+        """
+        return IDAStar.run(origin, stop, g, h, inplace=inplace, pruning=pruning,
+        workers=workers, split=split, stats=stats, transpositions=transpositions).solution
+
+    @staticmethod
+    def run(origin, stop, g, h, timeout=None, MaxNodes=None, progress=None,
+    inplace=False, pruning=True, workers=1, split=2, stats=None, transpositions=None):
+        """
+        The IDA* search with budgets, it can stop before the goal and
+        tells how far it went. Without timeout, MaxNodes and progress the
+        nodes are not counted and it runs the same code as search
+
+        :param origin: Initial state (the scrambled cube)
+        :param stop: Stop funtion, true for the goal state
+        :param g: Cumulative cost function (node.GetDepth)
+        :param h: Heuristic function (PDB lookup)
+        :param timeout: Seconds of wall time, None without limit
+        :param MaxNodes: Maximum number of generated nodes (calls to h),
+        None without limit. With several workers each process counts its
+        own nodes
+        :param progress: Optional function called at the end of every
+        iteration with a dictionary: bound, next (the next bound, None if
+        the goal was found), nodes and time since the start
+        :param inplace, pruning, workers, split, stats, transpositions: As
+        in search
+        :return: SearchResult
         """
+        StartTime = time.perf_counter()
         # The initial bound is the heuristic cost of the starting node.
         bound = h(origin)
+        counter = None
+        if timeout != None or MaxNodes != None or progress != None:
+            counter = [0]
+            h = LimitedHeuristic(h, counter,
+            None if timeout == None else StartTime+timeout, MaxNodes)
+        # The processes of the pool do not count, their SearchStats has no
+        # open iteration
+        WorkerH, WorkerStop = h, stop
+        if stats != None:
+            h = stats.CountHeuristic(h)
+            stop = stats.CountGoal(stop)
         
         print(f"Starting IDA* search with initial bound: {bound}")
-        
-        while True:
-            # Call the internal recursive helper
-            found, value = IDAStar._search_recursive(origin, stop, g, h, bound)
-            
-            # 1. Solution Found
-            if found:
-                print("\nSolution found!")
-                return Trajectory(value) # 'value' is the goal node
-            
-            # 2. No Solution Possible
-            if value == float('inf'):
-                print("\nNo solution found (entire space explored).")
-                return None
-            
-            # 3. No Solution Found in this iteration
-            print(f"Bound {bound} failed, increasing to {value}")
-            bound = value
+
+        table = MovePruning if pruning else ParentPruning
+        if workers > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+            print("The parallel search needs fork, using a single process")
+            workers = 1
+        pool = None
+        if workers > 1:
+            inplace = True
+            cancel = multiprocessing.RawValue('b', 0)
+            pool = multiprocessing.get_context('fork').Pool(workers, _StartSearchWorker,
+            (origin, WorkerStop, g, WorkerH, table, cancel))
+        elif transpositions != None:
+            inplace = True
+
+        if inplace:
+            # Working copy, the origin is never modified
+            state = RubikPuzzle(depth=origin.depth)
+            state.configuration = origin.configuration
+            state.last = origin.last
+
+        solution = None
+        # Last bound searched completely
+        completed = None
+        iterations = 0
+        try:
+            while True:
+                if stats != None:
+                    stats.StartIteration(bound)
+                try:
+                    # Call the internal recursive helper
+                    if pool != None:
+                        found, value = IDAStar._search_parallel(pool, cancel, state,
+                        stop, g, h, bound, table, split)
+                    elif inplace:
+                        found, value = IDAStar._search_in_place(state, [], origin.last,
+                        stop, g, h, bound, table, None, transpositions)
+                    else:
+                        found, value = IDAStar._search_recursive(origin, stop, g, h, bound, pruning)
+                except SearchLimit as limit:
+                    # The working copy is left in the middle of the tree,
+                    # it is not used again
+                    if stats != None:
+                        stats.EndIteration(False)
+                    status = limit.status
+                    print(f"\nSearch stopped ({status}) inside bound {bound}")
+                    break
+                if stats != None:
+                    stats.EndIteration(found)
+                iterations += 1
+                if progress != None:
+                    progress({"bound": bound, "next": None if found else value,
+                    "nodes": counter[0], "time": time.perf_counter() - StartTime})
+                completed = bound
+                
+                # 1. Solution Found
+                if found:
+                    print("\nSolution found!")
+                    status = SearchResult.Solved
+                    if inplace:
+                        # The states are rebuilt only for the solution
+                        solution = TrajectoryFromActions(origin, value)
+                    else:
+                        solution = Trajectory(value) # 'value' is the goal node
+                    break
+                
+                # 2. No Solution Possible
+                if value == float('inf'):
+                    print("\nNo solution found (entire space explored).")
+                    status = SearchResult.Exhausted
+                    break
+                
+                # 3. No Solution Found in this iteration
+                print(f"Bound {bound} failed, increasing to {value}")
+                bound = value
+        finally:
+            if pool != None:
+                pool.terminate()
+        return SearchResult(status, solution, completed,
+        None if counter == None else counter[0], time.perf_counter() - StartTime,
+        iterations, stats)
+
+class SearchLimit(Exception):
+    """
+    Raised inside the search when a budget is spent, it unwinds the
+    recursion up to IDAStar.run
+    """
+    def __init__(self, status):
+        """
+        :param status: SearchResult.TimedOut or SearchResult.NodeLimit
+        """
+        super().__init__(status)
+        self.status = status
+
+def LimitedHeuristic(h, counter, deadline, MaxNodes):
+    """
+    :param h: Heuristic function h(s)
+    :param counter: list of one int, the nodes generated so far
+    :param deadline: time.perf_counter() limit, None without limit
+    :param MaxNodes: Maximum number of nodes, None without limit
+    :return: h that counts the nodes and raises SearchLimit when a budget
+    is spent. The clock is read every 1024 nodes
+    """
+    def limited(state):
+        counter[0] += 1
+        if MaxNodes != None and counter[0] > MaxNodes:
+            raise SearchLimit(SearchResult.NodeLimit)
+        if deadline != None and counter[0]&1023 == 0 and time.perf_counter() > deadline:
+            raise SearchLimit(SearchResult.TimedOut)
+        return h(state)
+    return limited
+
+class TranspositionTable:
+    """
+    Fixed-size table of the subtrees searched by the in-place IDA*. The
+    key is the configuration and the last move, the slot is its hash
+    modulo the size, and each slot keeps one entry: the budget (bound
+    minus g) of the search of the subtree and how much its smallest
+    f-cost over the bound exceeded g. A subtree searched without the goal
+    does not have it with a smaller budget either, so it is skipped. When
+    two keys share a slot the one searched with the larger budget stays
+    (replace-by-depth). The entries are valid for all the iterations
+    """
+    def __init__(self, size=1<<16):
+        """
+        :param size: Number of slots
+        """
+        self.size = size
+        self.keys = [None]*size
+        self.budgets = [0]*size
+        self.excesses = [0]*size
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.replaced = 0
+
+    def Probe(self, key, budget):
+        """
+        :param key: Key of the node
+        :param budget: Bound minus the cost of the node
+        :return: None if the subtree must be searched, else its smallest
+        f-cost over the bound minus the cost of the node. With a smaller
+        budget than the stored one only budget+1 is known (unit costs)
+        """
+        self.probes += 1
+        slot = hash(key) % self.size
+        if self.keys[slot] != key or self.budgets[slot] < budget:
+            return None
+        self.hits += 1
+        if self.budgets[slot] == budget:
+            return self.excesses[slot]
+        return budget+1
+
+    def Store(self, key, budget, excess):
+        """
+        Records a subtree searched without the goal
+        :param key: Key of the node
+        :param budget: Bound minus the cost of the node
+        :param excess: Smallest f-cost over the bound minus the cost
+        """
+        slot = hash(key) % self.size
+        stored = self.keys[slot]
+        if stored != None and stored != key and self.budgets[slot] > budget:
+            return
+        if stored != None and stored != key:
+            self.replaced += 1
+        self.keys[slot] = key
+        self.budgets[slot] = budget
+        self.excesses[slot] = excess
+        self.stores += 1
+
+    def Memory(self):
+        """
+        :return: Bytes of the three lists and the stored keys
+        """
+        return sys.getsizeof(self.keys)+sys.getsizeof(self.budgets)+ \
+        sys.getsizeof(self.excesses)+sum(sys.getsizeof(key) for key in self.keys if key != None)
+
+    def Clear(self):
+        """
+        Removes all the entries, for a new cube
+        """
+        self.keys = [None]*self.size
+        self.probes = self.hits = self.stores = self.replaced = 0
+
+class SearchResult:
+    """
+    Outcome of IDAStar.run
+    """
+    # Values of status
+    Solved = 'solved'
+    TimedOut = 'timeout'
+    NodeLimit = 'nodes'
+    Exhausted = 'exhausted'
+
+    def __init__(self, status, solution, bound, nodes, elapsed, iterations, stats=None):
+        """
+        :param status: Solved, TimedOut, NodeLimit or Exhausted (the whole
+        space was searched without the goal)
+        :param solution: The trajectory of the solution, None if not solved
+        :param bound: Last bound searched completely, the bound of the
+        solution if solved, None if no iteration was completed. Without
+        the goal an optimal solution is longer than this bound
+        :param nodes: Generated nodes, None if they were not counted
+        :param elapsed: Seconds of the search
+        :param iterations: Completed iterations
+        :param stats: The SearchStats of the search, if any
+        """
+        self.status = status
+        self.solution = solution
+        self.bound = bound
+        self.nodes = nodes
+        self.elapsed = elapsed
+        self.iterations = iterations
+        self.stats = stats
+
+    def ToDict(self):
+        """
+        :return: dictionary with the result, without the states
+        """
+        result = {"status": self.status, "bound": self.bound, "nodes": self.nodes,
+        "time": self.elapsed, "iterations": self.iterations}
+        if self.solution != None:
+            result["length"] = len(self.solution)-1
+        if self.stats != None:
+            result["stats"] = self.stats.Totals()
+        return result
+
+    def __repr__(self):
+        return f"SearchResult({self.status}, bound={self.bound}, nodes={self.nodes}, time={self.elapsed:.3f}s)"
+
+# State of each process of the parallel IDA*
+_SearchWorker = {}
+
+def _StartSearchWorker(origin, stop, g, h, table, cancel):
+    """
+    Initializer of the processes of the parallel IDA*
+    :param origin: Initial state
+    :param stop: Stop function
+    :param g: Cost function
+    :param h: Heuristic function
+    :param table: Pruning table
+    :param cancel: Shared flag, set when the goal is found
+    """
+    _SearchWorker.update(origin=origin, stop=stop, g=g, h=h, table=table, cancel=cancel)
+
+def _SearchSubtree(task):
+    """
+    Searches a subtree of the current iteration in a process of the pool
+    :param task: tuple (path, last, bound), the actions from the origin
+    to the root of the subtree, its pruning key and the f-cost limit
+    :return: A tuple (found, value) as IDAStar._search_in_place
+    """
+    path, last, bound = task
+    cancel = _SearchWorker['cancel']
+    if cancel.value:
+        return (False, float('inf'))
+    origin = _SearchWorker['origin']
+    state = RubikPuzzle(depth=origin.depth+len(path))
+    state.configuration = origin.configuration
+    for action in path:
+        state.configuration = ApplyAction(state.configuration, action)
+    found, value = IDAStar._search_in_place(state, list(path), last,
+    _SearchWorker['stop'], _SearchWorker['g'], _SearchWorker['h'], bound,
+    _SearchWorker['table'], cancel)
+    if found:
+        # The other processes stop
+        cancel.value = 1
+    return (found, value)
 
 # --- (End of IDAStar Class Implementation) ---
 
 
 #Definition in the function for IDA*
-def IDA_Star(p, stop, g, h):
-    return IDAStar.search(p, stop, g, h)
+def IDA_Star(p, stop, g, h, inplace=False, pruning=True, workers=1, stats=None):
+    return IDAStar.search(p, stop, g, h, inplace, pruning, workers, stats=stats)
+
+#Definition in the function for IDA* with budgets, returns a SearchResult
+def Anytime_IDA_Star(p, stop, g, h, timeout=None, MaxNodes=None, progress=None,
+inplace=True, pruning=True, workers=1, stats=None, transpositions=None):
+    return IDAStar.run(p, stop, g, h, timeout, MaxNodes, progress, inplace, pruning,
+    workers, stats=stats, transpositions=transpositions)
 
 #Color codes
 #White
@@ -248,6 +732,10 @@ BLANK = ' '*6
 FILL = 9608
 # how many times the fill character
 K = 2
+# Colored block of each color code, built once
+ColorBlocks = [colored(chr(FILL), ColorMap[color])*K for color in range(len(ColorMap))]
+# Letter of each color code in the compact text
+ColorLetters = ''.join(ColorMap[color][0].upper() for color in range(len(ColorMap)))
     
 # The actions are lists of lists of lists of tuples
 # they represent 90 degree rotations on all faces of the cube
@@ -307,6 +795,412 @@ actions = [
 InitialConf = reduce(lambda x,y:(0,x[1]|(y[1]<<y[0])), \
 [(0,0)]+[v for k,v in code.items()])[1]
 
+# Every action as a tuple (axis, row, direction), in the order Expand uses
+ActionList = list(product([0,1,2],[0,1],[0,1]))
+
+def CompileAction(action):
+    """
+    Compiles a 90 degree turn into a fixed facelet permutation
+    :param action: Action tuple (axis, row, direction)
+    :return: tuple (permutation, keep mask, left shifts, right shifts).
+    permutation[i] is the facelet whose color lands on facelet i. The
+    shifts are tuples (source mask, bits), one for each distance, so all
+    the facelets that travel the same number of bits move in one shift
+    """
+    pairs = actions[action[0]][action[1]]
+    if action[2] == 1:
+        # Turn from right to left, the pairs are reversed
+        pairs = [(b,a) for a,b in pairs]
+    permutation = list(range(54))
+    keep = (1<<162)-1
+    left = {}
+    right = {}
+    for a, b in pairs:
+        source = code[a][0]
+        target = code[b][0]
+        permutation[target//3] = source//3
+        keep &= ~(7<<source)
+        if target > source:
+            left[target-source] = left.get(target-source,0)|(7<<source)
+        else:
+            right[source-target] = right.get(source-target,0)|(7<<source)
+    return (tuple(permutation), keep,
+    tuple((mask,bits) for bits,mask in left.items()),
+    tuple((mask,bits) for bits,mask in right.items()))
+
+# The 12 turns are compiled only once, when the module is imported
+MoveTable = {action:CompileAction(action) for action in ActionList}
+
+def CompileActionName(action):
+    """
+    Name of an action in the usual notation: the letter of the face,
+    with ' when it turns counterclockwise seen from that face
+    :param action: Action tuple (axis, row, direction)
+    :return: the name, for example "U" or "R'"
+    """
+    permutation = MoveTable[action][0]
+    for name, letters in zip('ULFRBD', faceLetters):
+        corner = code[letters[0]][0]//3
+        # The face that turns keeps its facelets, the corner of the top
+        # left goes to the top right when it turns clockwise
+        if permutation[code[letters[2]][0]//3] == corner:
+            return name
+        if permutation[code[letters[6]][0]//3] == corner:
+            return name+"'"
+
+ActionNames = {action:CompileActionName(action) for action in ActionList}
+
+# The action that undoes each action, same face in the other direction
+InverseAction = {action:(action[0],action[1],1-action[2]) for action in ActionList}
+
+"""
+Move pruning. Many sequences of actions reach the same configuration,
+the tables keep only one of them and are keyed on the last move:
+- None before the first action
+- An action tuple (axis, row, direction)
+- (axis, row, 2) when the same face was turned twice, a half turn
+
+The rules of MovePruning:
+- A face is never followed by its inverse
+- A face is turned twice in a row only clockwise (direction 0),
+the half turn counterclockwise is the same state
+- A face is never turned a third time, that is the inverse turn
+- The two faces of an axis commute, row 0 always goes first
+
+ParentPruning only drops the inverse of the last action, the same
+as comparing each successor against the parent
+"""
+PruningKeys = [None]+ActionList+[(axis,row,2) for axis,row in product([0,1,2],[0,1])]
+
+# Small number of each key, at most 5 bits
+PruningKeyIndex = {key:i for i, key in enumerate(PruningKeys)}
+
+def PruningKey(last, action):
+    """
+    Key of the pruning tables after an action
+    :param last: The key before the action
+    :param action: Action tuple (axis, row, direction)
+    :return: The new key
+    """
+    if last == action and action[2] == 0:
+        # Same face twice, a half turn
+        return (action[0], action[1], 2)
+    return action
+
+def AllowedAction(last, action):
+    """
+    Determines if an action follows the last move in a canonical sequence
+    :param last: The key of the last move
+    :param action: Action tuple (axis, row, direction)
+    :return: true if the action is not pruned
+    """
+    if last == None or last[0] != action[0]:
+        return True
+    if last[1] == action[1]:
+        # Same face, only the first half turn
+        return last[2] == 0 and action[2] == 0
+    # Opposite face of the same axis
+    return last[1] < action[1]
+
+MovePruning = {last:[action for action in ActionList if AllowedAction(last, action)]
+for last in PruningKeys}
+
+ParentPruning = {last:[action for action in ActionList
+if last == None or action != InverseAction[(last[0],last[1],last[2]%2)]]
+for last in PruningKeys}
+
+def ApplyAction(configuration, action):
+    """
+    Applies an action to a bit-encoded configuration using the compiled tables
+    :param configuration: The bit-encoded configuration
+    :param action: Action tuple (axis, row, direction)
+    :return: The new bit-encoded configuration
+    """
+    _, keep, left, right = MoveTable[action]
+    moved = configuration&keep
+    for mask, bits in left:
+        moved |= (configuration&mask)<<bits
+    for mask, bits in right:
+        moved |= (configuration&mask)>>bits
+    return moved
+
+"""
+Cubie level. The pieces of the cube are 8 corners and 12 edges, each
+slot lists the letters of its facelets. The first facelet of a corner
+is on the top or bottom face and the others follow clockwise, the first
+facelet of an edge is on the top or bottom face (front or back for the
+edges of the middle layer).
+
+Corners: URF, UFL, ULB, UBR, DFR, DLF, DBL, DRB
+Edges: UR, UF, UL, UB, DR, DF, DL, DB, FR, FL, BL, BR
+"""
+CornerFacelets = [('I','O','Ñ'),('G','M','L'),('A','J','T'),('C','R','Q'),
+('t','l','m'),('r','i','j'),('x','q','g'),('z','ñ','o')]
+
+EdgeFacelets = [('F','P'),('H','N'),('D','K'),('B','S'),('w','n'),('s','k'),
+('u','h'),('y','p'),('Z','a'),('X','W'),('f','U'),('d','c')]
+
+# Names of the slots, in the order of CornerFacelets and EdgeFacelets
+CornerNames = ['URF','UFL','ULB','UBR','DFR','DLF','DBL','DRB']
+EdgeNames = ['UR','UF','UL','UB','DR','DF','DL','DB','FR','FL','BL','BR']
+
+# Colors of each piece in the solved cube
+CornerColors = [tuple(code[letter][1] for letter in slot) for slot in CornerFacelets]
+EdgeColors = [tuple(code[letter][1] for letter in slot) for slot in EdgeFacelets]
+
+# The bit position of every facelet of the slots
+CornerBits = [tuple(code[letter][0] for letter in slot) for slot in CornerFacelets]
+EdgeBits = [tuple(code[letter][0] for letter in slot) for slot in EdgeFacelets]
+
+# The colors read in a slot identify the piece and its orientation, the
+# orientation is the position of the first color of the piece in the slot
+CornerByColors = {tuple(colors[(k-twist)%3] for k in range(3)):(piece,twist)
+for piece, colors in enumerate(CornerColors) for twist in range(3)}
+EdgeByColors = {(colors[flip],colors[1-flip]):(piece,flip)
+for piece, colors in enumerate(EdgeColors) for flip in range(2)}
+
+def CompileCubieAction(action, slots, turns):
+    """
+    Translates the facelet permutation of an action to the pieces
+    :param action: Action tuple (axis, row, direction)
+    :param slots: CornerFacelets or EdgeFacelets
+    :param turns: The orientations of a piece, 3 corners or 2 edges
+    :return: tuple (permutation, orientation). The slot i receives the
+    piece of the slot permutation[i] and orientation[i] is added to its
+    orientation
+    """
+    facelets = MoveTable[action][0]
+    index = [tuple(code[letter][0]//3 for letter in slot) for slot in slots]
+    # The slot where each facelet is
+    location = {f:(i,k) for i, slot in enumerate(index) for k, f in enumerate(slot)}
+    permutation = []
+    orientation = []
+    for slot in index:
+        source, position = location[facelets[slot[0]]]
+        twist = (-position)%turns
+        # The whole piece moves, turning all its facelets the same
+        assert all(location[facelets[f]] == (source,(k-twist)%turns)
+        for k, f in enumerate(slot))
+        permutation.append(source)
+        orientation.append(twist)
+    return (tuple(permutation), tuple(orientation))
+
+CornerMoveTable = {action:CompileCubieAction(action, CornerFacelets, 3)
+for action in ActionList}
+EdgeMoveTable = {action:CompileCubieAction(action, EdgeFacelets, 2)
+for action in ActionList}
+
+# 8! permutations times 3^7 orientations of the corners
+CornerPermutations = 40320
+CornerOrientations = 2187
+
+def CornerIndex(configuration):
+    """
+    Perfect hash of the corners of a configuration
+    :param configuration: The bit-encoded configuration
+    :return: index from 0 to 88,179,839
+    """
+    # Lehmer code of the permutation and base-3 orientations, in one
+    # pass. The pieces smaller than the current one that are still to the
+    # right are the smaller pieces not used yet
+    rank = 0
+    index = 0
+    used = 0
+    for i, (a, b, c) in enumerate(CornerBits):
+        piece, twist = CornerByColors[((configuration>>a)&7,
+        (configuration>>b)&7, (configuration>>c)&7)]
+        rank = rank*(8-i)+piece-(used&((1<<piece)-1)).bit_count()
+        used |= 1<<piece
+        index = index*3+twist
+    # The orientation of the last corner is not part of the index
+    return rank*CornerOrientations+index//3
+
+def CornerCoordinateTables():
+    """
+    Move tables of the corner coordinates, computed with NumPy
+    :return: tuple (permutation table, orientation table). Arrays of
+    shape (40320, 12) and (2187, 12) with the rank and the orientation
+    index reached by each action, in the order of ActionList
+    """
+    # permutations() is in lexicographic order, the row is the rank
+    pieces = np.array(list(permutations(range(8))), dtype=np.int8)
+    factorial = [5040,720,120,24,6,2,1]
+    digits = np.zeros((CornerOrientations,8), dtype=np.int8)
+    index = np.arange(CornerOrientations)
+    for k in range(7):
+        digits[:,k] = (index//3**(6-k))%3
+    # The orientation of the last corner is fixed by the others
+    digits[:,7] = (-digits[:,:7].sum(axis=1))%3
+    PermutationTable = np.zeros((CornerPermutations,12), dtype=np.int32)
+    OrientationTable = np.zeros((CornerOrientations,12), dtype=np.int32)
+    for m, action in enumerate(ActionList):
+        source, twist = CornerMoveTable[action]
+        moved = pieces[:,source]
+        for i in range(7):
+            smaller = (moved[:,i+1:] < moved[:,i:i+1]).sum(axis=1)
+            PermutationTable[:,m] += smaller*factorial[i]
+        turned = (digits[:,source]+np.array(twist, dtype=np.int8))%3
+        for k in range(7):
+            OrientationTable[:,m] += turned[:,k].astype(np.int32)*3**(6-k)
+    return PermutationTable, OrientationTable
+
+"""
+Symmetries of the cube. A symmetry is a rotation or a reflection of the
+whole cube: it moves the facelets and, as the centers move too, renames
+the colors. They are found as the automorphisms of the graph of the
+facelets, where two facelets are joined if they are neighbours on a face
+or belong to the same piece. There are 48, and 16 of them keep the U/D
+axis (4 rotations about it, turning the cube upside down and the mirror).
+
+The conjugate of a configuration by a symmetry is the same cube seen
+from the other side, its distance to InitialConf is the same because the
+set of the 12 actions is closed under the symmetries.
+"""
+
+def FaceletGraph():
+    """
+    :return: dictionary letter -> {neighbour letter: kind}, kind is
+    'face' for the neighbours on the same face, 'piece' for the other
+    facelets of the same corner or edge
+    """
+    graph = {letter:{} for letters in faceLetters for letter in letters}
+    for letters in faceLetters:
+        for i, letter in enumerate(letters):
+            row, column = divmod(i, 3)
+            for j, other in enumerate(letters):
+                if abs(row-j//3)+abs(column-j%3) == 1:
+                    graph[letter][other] = 'face'
+    for slot in CornerFacelets+EdgeFacelets:
+        for letter in slot:
+            for other in slot:
+                if other != letter:
+                    graph[letter][other] = 'piece'
+    return graph
+
+def CubeSymmetries():
+    """
+    All the symmetries of the cube
+    :return: list of tuples (facelets, colors). facelets maps each letter
+    to the letter where its facelet goes, colors[c] is the new name of
+    the color c. The identity is the first one
+    """
+    graph = FaceletGraph()
+    # Breadth-first order from a corner facelet, every facelet after the
+    # first has a neighbour earlier in the order
+    start = CornerFacelets[0][0]
+    order = [start]
+    for letter in order:
+        for other in graph[letter]:
+            if other not in order:
+                order.append(other)
+    symmetries = []
+
+    def extend(mapping, used, k):
+        if k == len(order):
+            symmetries.append(dict(mapping))
+            return
+        letter = order[k]
+        # The image must keep every joint with the facelets already mapped
+        mapped = [(other, kind) for other, kind in graph[letter].items() if other in mapping]
+        other, kind = mapped[0]
+        for candidate, CandidateKind in graph[mapping[other]].items():
+            if CandidateKind != kind or candidate in used or \
+            len(graph[candidate]) != len(graph[letter]):
+                continue
+            if all(graph[mapping[o]].get(candidate) == k2 for o, k2 in mapped):
+                mapping[letter] = candidate
+                used.add(candidate)
+                extend(mapping, used, k+1)
+                used.discard(candidate)
+                del mapping[letter]
+
+    for image in [letter for slot in CornerFacelets for letter in slot]:
+        extend({start:image}, {image}, 1)
+    result = []
+    for facelets in symmetries:
+        colors = [0]*len(ColorMap)
+        for letters in faceLetters:
+            colors[code[letters[4]][1]] = code[facelets[letters[4]]][1]
+        result.append((facelets, tuple(colors)))
+    # The identity first, it maps every facelet to itself
+    result.sort(key=lambda symmetry: sum(a != b for a, b in symmetry[0].items()))
+    assert len(result) == 48 and all(a == b for a, b in result[0][0].items())
+    return result
+
+def SymmetrySource(symmetry, pattern):
+    """
+    :param symmetry: tuple (facelets, colors) of CubeSymmetries
+    :param pattern: The letters of a pattern that the symmetry keeps in place
+    :return: list with the position in the pattern of the facelet whose
+    color each facelet of the pattern receives
+    """
+    facelets = symmetry[0]
+    position = {letter:i for i, letter in enumerate(pattern)}
+    source = [0]*len(pattern)
+    for letter in pattern:
+        source[position[facelets[letter]]] = position[letter]
+    return source
+
+def PatternSymmetries(pattern, symmetries=None):
+    """
+    :param pattern: The letters of a pattern
+    :param symmetries: The candidates, UDSymmetries if not given
+    :return: The symmetries that keep the pattern in place
+    """
+    letters = set(pattern)
+    return [symmetry for symmetry in (symmetries if symmetries != None else UDSymmetries)
+    if {symmetry[0][letter] for letter in letters} == letters]
+
+def CompileSymmetry(symmetry, pattern):
+    """
+    Compiles the conjugation by a symmetry for the facelets of a pattern
+    that the symmetry keeps in place
+    :param symmetry: tuple (facelets, colors) of CubeSymmetries
+    :param pattern: The letters of the pattern, in the order of the colors
+    given to the conjugation
+    :return: tuple (gather, table). gather is the itemgetter that picks,
+    for each facelet of the pattern, the one whose color it receives,
+    and table renames the colors with bytes.translate
+    """
+    colors = symmetry[1]
+    return itemgetter(*SymmetrySource(symmetry, pattern)), \
+    bytes(colors)+bytes(range(len(colors),256))
+
+# The symmetries that keep the U/D axis: the U center goes to U or D
+CubeSymmetryList = CubeSymmetries()
+UDSymmetries = [symmetry for symmetry in CubeSymmetryList
+if symmetry[0][faceLetters[0][4]] in (faceLetters[0][4], faceLetters[5][4])]
+
+"""
+Text of a cube. The letters are read in the order of the drawing, the
+bit position of each one is computed once, and the colored blocks are
+the 6 strings of ColorBlocks, so a drawing is one pass over the
+configuration and a format. The drawings are cached by configuration,
+a solution path printed twice is only rendered once
+"""
+# Letters in the order of the drawing, row by row
+DisplayLetters = ('ABC'+'DEF'+'GHI'+'JKLMNÑOPQRST'+'UVWXYZabcdef'+'ghijklmnñopq'+
+'rst'+'uvw'+'xyz')
+DisplayShifts = [code[letter][0] for letter in DisplayLetters]
+DisplayTemplate = ('\n'+(BLANK+'{}'*3+'\n')*3+('{}'*12+'\n')*3+(BLANK+'{}'*3+'\n')*3)
+# Letters in the order of faceLetters, for the compact text
+CompactShifts = [code[letter][0] for letters in faceLetters for letter in letters]
+
+@lru_cache(maxsize=4096)
+def RenderConfiguration(configuration):
+    """
+    :param configuration: The bit-encoded configuration
+    :return: The colored drawing of the cube
+    """
+    return DisplayTemplate.format(*[ColorBlocks[(configuration>>n)&7] for n in DisplayShifts])
+
+def CompactString(configuration):
+    """
+    :param configuration: The bit-encoded configuration
+    :return: string of 54 letters, see RubikPuzzle.Compact
+    """
+    return ''.join([ColorLetters[(configuration>>n)&7] for n in CompactShifts])
+
 class RubikPuzzle:
     """
     3 x 3 Rubik's Cube. Implementation with all subcubes
@@ -322,10 +1216,13 @@ class RubikPuzzle:
         """
         self.parent = parent
         self.depth = depth
+        # The last move, key of the pruning tables
+        self.last = None
         if parent != None and action!=None:
             # the cube is created from the parent's configuration
             self.configuration = parent.configuration
             self.apply(action)
+            self.last = PruningKey(parent.last, action)
         elif pattern!=None:
             # the configuration is established with the map
             self.configuration = self.initialize(pattern)
@@ -350,13 +1247,27 @@ class RubikPuzzle:
         :return: the string to display as a subcube
         """
         n = code[symbol][0]
-        return \
-        colored(chr(FILL),ColorMap[(((7<<n)&self.configuration)>>n)])*K
+        return ColorBlocks[(self.configuration>>n)&7]
+
+    def Compact(self):
+        """
+        The cube as text without colors, one letter per facelet
+        :return: string of 54 letters (W, G, R, B, C, Y), the faces in
+        the order of faceLetters
+        """
+        return CompactString(self.configuration)
         
     def apply(self,action):
         """
         Apply the action to the configuration
         """
+        self.configuration = ApplyAction(self.configuration, action)
+
+    def applyReference(self,action):
+        """
+        Apply the action rebuilding the move from the pairs of letters.
+        Slow, it is kept to validate and benchmark the compiled tables
+        """
         # Action tuple (axis, row, direction)
         # Turn from left to right
         if(action[2]==0):
@@ -386,25 +1297,7 @@ class RubikPuzzle:
         The cube to be displayed in text.
         :return: representation of the cube in text
         """
-        return ('\n'+
-        BLANK+self.cube('A')+self.cube('B')+self.cube('C')+'\n'+
-        BLANK+self.cube('D')+self.cube('E')+self.cube('F')+'\n'+
-        BLANK+self.cube('G')+self.cube('H')+self.cube('I')+'\n'+
-        self.cube('J')+self.cube('K')+self.cube('L')+
-        self.cube('M')+self.cube('N')+self.cube('Ñ')+
-        self.cube('O')+self.cube('P')+self.cube('Q')+  
-        self.cube('R')+self.cube('S')+self.cube('T')+'\n'+
-        self.cube('U')+self.cube('V')+self.cube('W') +
-        self.cube('X')+self.cube('Y')+self.cube('Z') +
-        self.cube('a')+self.cube('b')+self.cube('c')+ 
-        self.cube('d')+self.cube('e')+self.cube('f') +'\n'+        
-        self.cube('g')+self.cube('h')+self.cube('i')+
-        self.cube('j')+self.cube('k')+self.cube('l') +
-        self.cube('m')+self.cube('n')+self.cube('ñ')+ 
-        self.cube('o')+self.cube('p')+self.cube('q') +'\n'+                
-        BLANK+self.cube('r')+self.cube('s')+self.cube('t')+'\n'+
-        BLANK+self.cube('u')+self.cube('v')+self.cube('w')+'\n'+
-        BLANK+self.cube('x')+self.cube('y')+self.cube('z')+'\n' )
+        return RenderConfiguration(self.configuration)
         
     def __repr__(self):
         """
@@ -472,12 +1365,15 @@ class RubikPuzzle:
     def GetDepth(self):
         return self.depth       
             
-    def Expand(self):
-        # we remove the predecessor
-        return list(filter(lambda x: \
-        (x!=self.parent), \
-        [RubikPuzzle(self,action,self.depth+1) \
-        for action in product([0,1,2],[0,1],[0,1])]))
+    def Expand(self, pruning=True):
+        """
+        Generates the successors of the cube
+        :param pruning: If true the redundant sequences are pruned with
+        MovePruning, if false only the predecessor is removed
+        :return: list with the successors
+        """
+        table = MovePruning if pruning else ParentPruning
+        return [RubikPuzzle(self,action,self.depth+1) for action in table[self.last]]
 
 
 class PatternBasedHeuristic:
@@ -493,6 +1389,8 @@ class PatternBasedHeuristic:
         :param pattern: the pattern with which the base is formed
         """
         print('computing pattern data base...')
+        # Optional SearchStats that counts the lookups
+        self.stats = None
         if(objective==None):
             # If we don't establish other objective we ask to order the cube 
             objective = RubikPuzzle()
@@ -525,8 +1423,14 @@ class PatternBasedHeuristic:
                 self.patterns[conf] = node.depth
             for child in node.Expand():
                 if(child.depth>depth):
-                    # All finished
-                    return 
+                    # All finished. The nodes left in the agenda are the
+                    # last level, they are added without expanding them,
+                    # otherwise they would get the value depth+1
+                    for rest in agenda:
+                        conf = self.pattern_mask&rest.configuration
+                        if conf not in self.patterns:
+                            self.patterns[conf] = rest.depth
+                    return
                 elif child not in self.explored:
                     # We add the child node to the case in which it hasn´t been expanded
                     agenda.append(child)
@@ -536,9 +1440,744 @@ class PatternBasedHeuristic:
         calculates heuristics using the database
         """
         key = self.pattern_mask&puzzle.configuration
+        if self.stats != None:
+            self.stats.Lookup(key not in self.patterns)
         return (self.patterns[key] \
         if key in self.patterns else self.depth+1)
     
+class SymmetricPatternHeuristic(PatternBasedHeuristic):
+    """
+    Pattern database reduced by the 16 symmetries that keep the U/D axis.
+    Every masked configuration is replaced by the smallest of its 16
+    conjugates before it is stored or looked up, so each symmetry class
+    is a single entry and the breadth-first search only expands one
+    configuration of each class. The values are the same as those of
+    PatternBasedHeuristic with the same pattern and depth
+    """
+    def __init__(self, depth=6, pattern=None, symmetries=None):
+        """
+        Create the pattern database
+        :param depth: the maximum depth of the states in the base
+        :param pattern: the pattern with which the base is formed, it must
+        be made of whole pieces (the corners if not given)
+        :param symmetries: The symmetries to use, UDSymmetries if not given.
+        Those that do not keep the pattern in place are left out
+        """
+        print('computing symmetric pattern data base...')
+        self.stats = None
+        self.depth = depth
+        if(pattern==None):
+            pattern ='ACGIJLgiMÑjlOQmñRToqrtxz'
+        self.pattern = pattern
+        self.pattern_mask = RubikPuzzle.GetpatternMask(pattern)
+        # The actions must move the pattern onto itself, otherwise the
+        # search can not work on the masked configurations
+        for action in ActionList:
+            if ApplyAction(self.pattern_mask, action) != self.pattern_mask:
+                raise ValueError(f"The pattern '{pattern}' is not made of whole pieces")
+        # Bit of the color of each facelet, the keys are the bytes of
+        # the colors of the pattern
+        self.bits = [code[letter][0] for letter in pattern]
+        self.symmetries = [CompileSymmetry(symmetry, pattern)
+        for symmetry in PatternSymmetries(pattern, symmetries)]
+        # Breadth-first search on the symmetry classes, the frontier holds
+        # one masked configuration of each new class
+        self.patterns = {self.Canonical(InitialConf):0}
+        frontier = [InitialConf&self.pattern_mask]
+        for level in range(1, depth+1):
+            children = []
+            for configuration in frontier:
+                for action in ActionList:
+                    child = ApplyAction(configuration, action)
+                    key = self.Canonical(child)
+                    if key not in self.patterns:
+                        self.patterns[key] = level
+                        children.append(child)
+            frontier = children
+
+    def Canonical(self, configuration):
+        """
+        :param configuration: A configuration, only the pattern is read
+        :return: The representative of its symmetry class, the smallest
+        of the colors of its conjugates
+        """
+        colors = bytes([(configuration>>bits)&7 for bits in self.bits])
+        return min([bytes(gather(colors)).translate(table)
+        for gather, table in self.symmetries])
+
+    def Heurisic(self,puzzle):
+        """
+        calculates heuristics using the database
+        """
+        key = self.Canonical(puzzle.configuration)
+        if self.stats != None:
+            self.stats.Lookup(key not in self.patterns)
+        return (self.patterns[key] \
+        if key in self.patterns else self.depth+1)
+
+# State of each process that computes a pattern database in parallel
+_PatternWorker = {}
+
+def _StartPatternWorker(database, tables, shared):
+    """
+    Initializer of the processes of the pool
+    :param database: The database being computed
+    :param tables: Its move tables
+    :param shared: The table, in shared memory
+    """
+    _PatternWorker['database'] = database
+    _PatternWorker['tables'] = tables
+    _PatternWorker['values'] = np.frombuffer(shared, dtype=np.uint8)
+
+def _ExpandPatternBlock(task):
+    """
+    Expands a block of a layer in a process of the pool
+    :param task: tuple (start, end, level)
+    :return: Number of entries reached for the first time
+    """
+    return _PatternWorker['database'].ExpandBlock(_PatternWorker['values'],
+    _PatternWorker['tables'], *task)
+
+def LoadPacked(values, indices):
+    """
+    :param values: NumPy uint8 array with two values per byte
+    :param indices: NumPy array of entries
+    :return: The 4-bit values of the entries
+    """
+    return (values[indices>>1]>>((indices&1)<<2).astype(np.uint8))&15
+
+def StorePacked(values, indices, value):
+    """
+    Writes a 4-bit value in some entries, the even and the odd entries are
+    written apart so no byte is written twice in the same assignment
+    :param values: NumPy uint8 array with two values per byte
+    :param indices: NumPy array of distinct entries
+    :param value: The value, less than 16
+    """
+    low = indices[(indices&1) == 0]>>1
+    values[low] = (values[low]&0xF0)|value
+    high = indices[(indices&1) == 1]>>1
+    values[high] = (values[high]&0x0F)|(value<<4)
+
+def SetBits(bitset, indices):
+    """
+    :param bitset: NumPy uint8 array, bit i is bit i%8 of the byte i//8
+    :param indices: NumPy array of the bits to set
+    """
+    np.bitwise_or.at(bitset, indices>>3, (1<<(indices&7)).astype(np.uint8))
+
+class DensePatternDatabase:
+    """
+    Pattern database stored as a dense table indexed by a perfect hash
+    of the pattern. Each entry is a distance of at most 4 bits, stored
+    one per byte in a flat bytearray. The subclasses define the index
+    and the move tables of their coordinates
+    """
+    # Value of the entries that were not reached
+    Unknown = 15
+    # Kind of database, part of the file name
+    name = None
+    # The letters of the pattern
+    pattern = None
+    # Number of entries of the table
+    size = 0
+    # Optional SearchStats that counts the lookups
+    stats = None
+    # True if the values are stored two per byte
+    packed = False
+
+    def __init__(self, depth=None, directory=None, workers=1, packed=False):
+        """
+        Create the pattern database
+        :param depth: the maximum depth of the states in the base,
+        None to complete the database
+        :param directory: If given, the database is memory-mapped from a
+        file in this directory, it is computed and written the first time
+        :param workers: Number of processes that compute the database,
+        only 1 with packed
+        :param packed: If true the values are stored two per byte, half
+        the memory, and computed by ComputePacked in a single process
+        """
+        if packed and workers > 1:
+            raise ValueError("The packed database is computed by a single process")
+        self.depth = depth
+        self.packed = packed
+        if directory != None:
+            name = self.name+'-packed' if packed else self.name
+            filename = PatternFileName(directory, name, self.pattern, depth)
+            loaded = LoadPatternTable(filename, self.pattern, depth)
+            if loaded != None:
+                print(f'loading {name} pattern data base from {filename}')
+                self.depth, self.table = loaded
+                return
+        if packed:
+            self.ComputePacked(depth)
+        else:
+            self.compute(depth, workers)
+        if directory != None:
+            SavePatternTable(filename, self.pattern, depth, self.depth, self.table)
+
+    def compute(self, depth, workers=1):
+        """
+        Computes the table with a breadth-first search over the ranks,
+        a whole layer at a time. With several workers each layer is split
+        in blocks that the processes expand over a shared array, the
+        layer ends when all the blocks are done, so the table is the
+        same as the one of a single process. The packed table is computed
+        by ComputePacked, always in a single process
+        :param depth: the maximum depth of the states in the base
+        :param workers: Number of processes
+        """
+        print(f'computing {self.name} pattern data base...')
+        tables = self.CoordinateTables()
+        pool = None
+        if workers > 1:
+            shared = multiprocessing.RawArray('B', self.size)
+            values = np.frombuffer(shared, dtype=np.uint8)
+            pool = multiprocessing.Pool(workers, _StartPatternWorker, (self, tables, shared))
+        else:
+            shared = bytearray(self.size)
+            # NumPy view over the same memory, for the search
+            values = np.frombuffer(shared, dtype=np.uint8)
+        values[:] = DensePatternDatabase.Unknown
+        values[self.Index(InitialConf)] = 0
+        level = 0
+        # The layer is scanned in blocks so the frontier stays small
+        block = 1<<22
+        try:
+            while depth == None or level < depth:
+                blocks = [(start, min(start+block, self.size), level)
+                for start in range(0, self.size, block)]
+                if pool != None:
+                    reached = sum(pool.map(_ExpandPatternBlock, blocks))
+                else:
+                    reached = sum(self.ExpandBlock(values, tables, *task) for task in blocks)
+                if reached == 0:
+                    # All the configurations of the pattern were reached
+                    break
+                level += 1
+                # The values must fit in 4 bits
+                assert level < DensePatternDatabase.Unknown
+        finally:
+            if pool != None:
+                pool.close()
+                pool.join()
+        self.depth = level
+        del values
+        self.table = shared if pool == None else bytearray(shared)
+
+    def ComputePacked(self, depth):
+        """
+        Computes the table with the values packed two per byte: the entry
+        i is the low half of the byte i//2 if i is even, the high half if
+        it is odd. The layer being expanded is a bitset over the indices,
+        so it is read from the bitset instead of scanning the table, and
+        the next layer is marked in the bitset from the table when the
+        layer is done. The memory is the table (size/2 bytes), the bitset
+        (size/8 bytes) and the arrays of a block of 2^18 indices: a peak
+        of 63 MB for the corners (44 MB of table), against 152 MB for the
+        table of bytes computed by one process
+        :param depth: the maximum depth of the states in the base
+        """
+        print(f'computing {self.name} packed pattern data base...')
+        tables = self.CoordinateTables()
+        # All the entries start as Unknown, 15 in both halves. The table
+        # is filled in place, a bytes of the same size would double the peak
+        table = bytearray((self.size+1)//2)
+        values = np.frombuffer(table, dtype=np.uint8)
+        values[:] = 0xFF
+        layer = np.zeros((self.size+7)//8, dtype=np.uint8)
+        start = np.array([self.Index(InitialConf)], dtype=np.int64)
+        StorePacked(values, start, 0)
+        SetBits(layer, start)
+        level = 0
+        # Bytes of the bitset expanded at a time, 2^18 indices
+        block = 1<<15
+        while depth == None or level < depth:
+            reached = 0
+            for first in range(0, layer.size, block):
+                bits = np.unpackbits(layer[first:first+block], bitorder='little')
+                frontier = np.flatnonzero(bits).astype(np.int64)+first*8
+                if frontier.size == 0:
+                    continue
+                for m in range(len(ActionList)):
+                    children = self.Children(tables, frontier, m)
+                    children = children[LoadPacked(values, children) == DensePatternDatabase.Unknown]
+                    if children.size == 0:
+                        continue
+                    # Two children in the same byte must not overwrite each other
+                    children = np.unique(children)
+                    StorePacked(values, children, level+1)
+                    reached += children.size
+            if reached == 0:
+                # All the configurations of the pattern were reached
+                break
+            level += 1
+            # The values must fit in 4 bits
+            assert level < DensePatternDatabase.Unknown
+            for first in range(0, layer.size, block):
+                # 8 indices per byte of the bitset, 4 bytes of the table
+                packed = values[first*4:(first+block)*4]
+                entries = np.empty(2*packed.size, dtype=np.uint8)
+                entries[0::2] = packed&15
+                entries[1::2] = packed>>4
+                bits = np.packbits(entries == level, bitorder='little')
+                layer[first:first+bits.size] = bits
+        self.depth = level
+        del values
+        self.table = table
+
+    def ExpandBlock(self, values, tables, start, end, level):
+        """
+        Expands the entries of a layer inside a block of the table
+        :param values: NumPy array over the table
+        :param tables: The move tables from CoordinateTables
+        :param start: First index of the block
+        :param end: Index after the block
+        :param level: The layer to expand
+        :return: Number of entries reached for the first time
+        """
+        reached = 0
+        frontier = np.flatnonzero(values[start:end] == level)+start
+        if frontier.size == 0:
+            return 0
+        for m in range(len(ActionList)):
+            children = self.Children(tables, frontier, m)
+            children = children[values[children] == DensePatternDatabase.Unknown]
+            values[children] = level+1
+            reached += children.size
+        return reached
+
+    def CoordinateTables(self):
+        """
+        Move tables used by Children
+        """
+        raise NotImplementedError
+
+    def Children(self, tables, frontier, m):
+        """
+        Indices reached from the frontier with one action
+        :param tables: The move tables from CoordinateTables
+        :param frontier: NumPy array of indices
+        :param m: position of the action in ActionList
+        :return: NumPy array (int64) with the index of each child
+        """
+        raise NotImplementedError
+
+    def Index(self, configuration):
+        """
+        Perfect hash of the pattern of a configuration
+        """
+        raise NotImplementedError
+
+    def Heurisic(self,puzzle):
+        """
+        calculates heuristics using the database
+        """
+        index = self.Index(puzzle.configuration)
+        if self.packed:
+            value = (self.table[index>>1]>>((index&1)<<2))&15
+        else:
+            value = self.table[index]
+        if self.stats != None:
+            self.stats.Lookup(value == DensePatternDatabase.Unknown)
+        return value if value != DensePatternDatabase.Unknown else self.depth+1
+
+class CornerPatternDatabase(DensePatternDatabase):
+    """
+    Pattern database of the 8 corners, indexed by the Lehmer rank of the
+    corner permutation times the orientation index (88,179,840 entries)
+    """
+    name = 'corners'
+    # Same letters as the default pattern of PatternBasedHeuristic
+    pattern = 'ACGIJLgiMÑjlOQmñRToqrtxz'
+    size = CornerPermutations*CornerOrientations
+
+    def CoordinateTables(self):
+        return CornerCoordinateTables()
+
+    def Children(self, tables, frontier, m):
+        PermutationTable, OrientationTable = tables
+        permutation, orientation = np.divmod(frontier, CornerOrientations)
+        return PermutationTable[permutation,m].astype(np.int64)* \
+        CornerOrientations+OrientationTable[orientation,m]
+
+    def Index(self, configuration):
+        return CornerIndex(configuration)
+
+class EdgePatternDatabase(DensePatternDatabase):
+    """
+    Pattern database of a group of edges, as in Korf's solver. The index
+    is the rank of the slots of the edges (a partial permutation of the
+    12 slots) times their flips, 12!/6! * 2^6 = 42,577,920 entries for
+    a group of 6 edges
+    """
+    name = 'edges'
+
+    def __init__(self, pieces=(0,1,2,3,4,5), depth=None, directory=None, workers=1, packed=False):
+        """
+        Create the pattern database
+        :param pieces: The edges of the group, indices of EdgeFacelets
+        :param depth: the maximum depth of the states in the base,
+        None to complete the database
+        :param directory: If given, the database is memory-mapped from a
+        file in this directory, it is computed and written the first time
+        :param workers: Number of processes that compute the database
+        :param packed: If true the values are stored two per byte
+        """
+        self.pieces = tuple(pieces)
+        self.pattern = ''.join(''.join(EdgeFacelets[piece]) for piece in self.pieces)
+        self.size = 1<<len(self.pieces)
+        for i in range(len(self.pieces)):
+            self.size *= 12-i
+        # Position of each edge in the group, -1 if it is not tracked
+        self.member = [-1]*12
+        for j, piece in enumerate(self.pieces):
+            self.member[piece] = j
+        super().__init__(depth, directory, workers, packed)
+
+    def CoordinateTables(self):
+        """
+        :return: tuple (slot table, flip table). For the rank of the slots
+        and each action, the new rank and the mask of the flipped edges
+        """
+        k = len(self.pieces)
+        # permutations() is in lexicographic order, the row is the rank
+        slots = np.array(list(permutations(range(12), k)), dtype=np.int8)
+        SlotTable = np.zeros((len(slots),12), dtype=np.int32)
+        FlipTable = np.zeros((len(slots),12), dtype=np.int32)
+        for m, action in enumerate(ActionList):
+            source, flip = EdgeMoveTable[action]
+            # The slot where the edge of each slot goes, and its flip
+            target = np.zeros(12, dtype=np.int8)
+            flipped = np.zeros(12, dtype=np.int32)
+            for i in range(12):
+                target[source[i]] = i
+                flipped[source[i]] = flip[i]
+            moved = target[slots]
+            for i in range(k):
+                smaller = (moved[:,:i] < moved[:,i:i+1]).sum(axis=1)
+                SlotTable[:,m] = SlotTable[:,m]*(12-i)+moved[:,i]-smaller
+                FlipTable[:,m] |= flipped[slots[:,i]]<<(k-1-i)
+        return SlotTable, FlipTable
+
+    def Children(self, tables, frontier, m):
+        SlotTable, FlipTable = tables
+        rank, flips = np.divmod(frontier, 1<<len(self.pieces))
+        return (SlotTable[rank,m].astype(np.int64)<<len(self.pieces))| \
+        (flips^FlipTable[rank,m])
+
+    def Index(self, configuration):
+        k = len(self.pieces)
+        slots = [0]*k
+        flips = 0
+        for i, (a, b) in enumerate(EdgeBits):
+            piece, flip = EdgeByColors[((configuration>>a)&7, (configuration>>b)&7)]
+            j = self.member[piece]
+            if j >= 0:
+                slots[j] = i
+                flips |= flip<<(k-1-j)
+        # Rank of the partial permutation, the slots smaller than the
+        # current one that are still free
+        rank = 0
+        used = 0
+        for i, slot in enumerate(slots):
+            rank = rank*(12-i)+slot-(used&((1<<slot)-1)).bit_count()
+            used |= 1<<slot
+        return (rank<<k)|flips
+
+class CompositeHeuristic:
+    """
+    Heuristic from several pattern databases, the maximum of their values.
+    With the corners and two groups of 6 edges it is the heuristic of
+    Korf's optimal solver
+    """
+    def __init__(self, databases, additive=None):
+        """
+        :param databases: list of pattern databases
+        :param additive: list of groups of positions in databases, the
+        values of each group are added before taking the maximum. The sum
+        is only admissible when no action moves pieces of two databases
+        of the group. In the cube every turn moves corners and edges, so
+        the sum gives faster searches but not always optimal solutions
+        """
+        self.databases = list(databases)
+        self.additive = [tuple(group) for group in additive] if additive else []
+        grouped = {i for group in self.additive for i in group}
+        self.single = [database for i, database in enumerate(self.databases)
+        if i not in grouped]
+
+    @staticmethod
+    def CornersAndEdges(depth=None, directory=None, workers=1, packed=False):
+        """
+        The corners and the two groups of 6 edges
+        :param depth: the maximum depth of the states in the bases
+        :param directory: Directory of the files of the databases
+        :param workers: Number of processes that compute each database
+        :param packed: If true the values are stored two per byte
+        """
+        return CompositeHeuristic([CornerPatternDatabase(depth, directory, workers, packed),
+        EdgePatternDatabase((0,1,2,3,4,5), depth, directory, workers, packed),
+        EdgePatternDatabase((6,7,8,9,10,11), depth, directory, workers, packed)])
+
+    def Heurisic(self,puzzle):
+        """
+        calculates heuristics using all the databases
+        """
+        value = 0
+        for database in self.single:
+            value = max(value, database.Heurisic(puzzle))
+        for group in self.additive:
+            value = max(value, sum(self.databases[i].Heurisic(puzzle) for i in group))
+        return value
+
+class MeetInTheMiddle:
+    """
+    Bidirectional solver. Every action has an inverse, so the backward
+    search from the solved cube is done once: a table with all the
+    configurations within depth actions of InitialConf. Each solve is a
+    forward search from the scramble that stops at the first node found
+    in the table, a scramble of d actions only needs d-depth forward
+    actions. The same table serves every cube of a batch
+    """
+    def __init__(self, depth=5):
+        """
+        Breadth-first search from the solved cube
+        :param depth: The maximum distance of the configurations in the
+        table, 5 holds about 10^5 configurations and 6 about 10^6
+        """
+        self.depth = depth
+        # configuration -> action that moves it one step closer to InitialConf
+        self.table = {InitialConf:None}
+        frontier = [(InitialConf, None)]
+        for level in range(depth):
+            children = []
+            for configuration, last in frontier:
+                for action in MovePruning[last]:
+                    child = ApplyAction(configuration, action)
+                    if child not in self.table:
+                        self.table[child] = InverseAction[action]
+                        children.append((child, PruningKey(last, action)))
+            frontier = children
+
+    def Backward(self, configuration):
+        """
+        :param configuration: A configuration of the table
+        :return: list of the actions from configuration to InitialConf
+        """
+        path = []
+        action = self.table[configuration]
+        while action != None:
+            path.append(action)
+            configuration = ApplyAction(configuration, action)
+            action = self.table[configuration]
+        return path
+
+    def Solve(self, p, MaxDepth=20, h=None):
+        """
+        Iterative deepening of the forward search: the first depth that
+        reaches the table gives an optimal solution, a shorter one would
+        have reached the table before
+        :param p: The puzzle to solve
+        :param MaxDepth: Maximum number of forward actions
+        :param h: Optional heuristic function h(s) (lambda), the branches
+        that can not reach the table in time are cut
+        :return: The trajectory of the solution, None if not found
+        """
+        return self.Run(p, MaxDepth, h).solution
+
+    def Run(self, p, MaxDepth=20, h=None, timeout=None, MaxNodes=None, stats=None):
+        """
+        Solve with budgets, as IDAStar.run
+        :param p: The puzzle to solve
+        :param MaxDepth: Maximum number of forward actions
+        :param h: Optional heuristic function h(s), see Solve
+        :param timeout: Seconds of wall time, None without limit
+        :param MaxNodes: Maximum number of nodes evaluated by h, None
+        without limit. Without h every node of the forward search counts
+        :param stats: Optional SearchStats, one iteration per forward
+        depth. generated counts the calls to h, expanded the nodes whose
+        successors are searched
+        :return: SearchResult. Its bound is the forward depth searched
+        completely plus the depth of the table: an optimal solution is
+        longer. Exhausted means that MaxDepth was reached
+        """
+        StartTime = time.perf_counter()
+        counter = None
+        if timeout != None or MaxNodes != None:
+            counter = [0]
+            h = LimitedHeuristic(h if h != None else (lambda state: 0), counter,
+            None if timeout == None else StartTime+timeout, MaxNodes)
+        if stats != None and h != None:
+            h = stats.CountHeuristic(h)
+        node = RubikPuzzle()
+        completed = None
+        status = SearchResult.Exhausted
+        solution = None
+        iterations = 0
+        for forward in range(MaxDepth+1):
+            node.configuration = p.configuration
+            if stats != None:
+                stats.StartIteration(forward+self.depth)
+            try:
+                path = self._search(node, [], p.last, forward, h,
+                None if stats == None else stats.current)
+            except SearchLimit as limit:
+                status = limit.status
+                if stats != None:
+                    stats.EndIteration(False)
+                break
+            if stats != None:
+                stats.EndIteration(path != None)
+            iterations += 1
+            if path != None:
+                status = SearchResult.Solved
+                solution = TrajectoryFromActions(p, path)
+                completed = len(path)
+                break
+            completed = forward+self.depth
+        return SearchResult(status, solution, completed,
+        None if counter == None else counter[0], time.perf_counter() - StartTime, iterations, stats)
+
+    def _search(self, node, path, last, togo, h, counters=None):
+        """
+        Depth-first search of exactly togo more actions, in place as
+        IDAStar._search_in_place
+        :param node: The only state (RubikPuzzle), modified in place
+        :param path: list of the actions applied from the origin to node
+        :param last: The key of the last move in the pruning table
+        :param togo: Forward actions left
+        :param h: Optional heuristic function, see Solve
+        :param counters: Optional counters of the current SearchStats
+        iteration, the expanded nodes are counted
+        :return: The actions of the whole solution, None if not found
+        """
+        configuration = node.configuration
+        if togo == 0:
+            if configuration in self.table:
+                return path+self.Backward(configuration)
+            return None
+        # Any node of the table is within depth actions of the goal
+        if h != None and h(node) > togo+self.depth:
+            return None
+        if counters != None:
+            counters["expanded"] += 1
+        for action in MovePruning[last]:
+            node.configuration = ApplyAction(configuration, action)
+            path.append(action)
+            found = self._search(node, path, PruningKey(last, action), togo-1, h, counters)
+            path.pop()
+            if found != None:
+                node.configuration = configuration
+                return found
+        node.configuration = configuration
+        return None
+
+def PermutationParity(permutation):
+    """
+    :param permutation: list with a permutation of 0..n-1
+    :return: 0 for an even permutation, 1 for an odd one
+    """
+    seen = [False]*len(permutation)
+    parity = 0
+    for start in range(len(permutation)):
+        # A cycle of length k is k-1 transpositions
+        length = 0
+        i = start
+        while not seen[i]:
+            seen[i] = True
+            i = permutation[i]
+            length += 1
+        if length:
+            parity ^= (length-1)&1
+    return parity
+
+def ValidatePattern(pattern):
+    """
+    Checks that a pattern is a cube that can be solved, before any
+    search: a cube taken apart and rebuilt wrong can never reach
+    InitialConf and IDA* would only stop with an infinite bound
+    :param pattern: A dictionary {letter:color code}, as PatternFromRows returns
+    :raises ValueError: with the first reason why the cube is not solvable
+    """
+    counts = [0]*len(ColorMap)
+    for color in pattern.values():
+        counts[color] += 1
+    for color, count in enumerate(counts):
+        if count != 9:
+            raise ValueError(f"The color {ColorMap[color]} appears {count} times, it must appear 9 times.")
+    # The centers never move, they must be those of the solved cube
+    for letters in faceLetters:
+        center = letters[4]
+        if pattern[center] != code[center][1]:
+            raise ValueError(f"The center of the {ColorMap[code[center][1]]} face is "
+            f"{ColorMap[pattern[center]]}.")
+    corners, twist = [], 0
+    for name, slot in zip(CornerNames, CornerFacelets):
+        colors = tuple(pattern[letter] for letter in slot)
+        if colors not in CornerByColors:
+            raise ValueError(f"The corner {name} has the colors "
+            f"{'/'.join(ColorMap[color] for color in colors)}, no corner has them.")
+        piece, orientation = CornerByColors[colors]
+        if piece in corners:
+            raise ValueError(f"The corner {CornerNames[piece]} appears twice, "
+            f"in {CornerNames[corners.index(piece)]} and {name}.")
+        corners.append(piece)
+        twist += orientation
+    edges, flip = [], 0
+    for name, slot in zip(EdgeNames, EdgeFacelets):
+        colors = tuple(pattern[letter] for letter in slot)
+        if colors not in EdgeByColors:
+            raise ValueError(f"The edge {name} has the colors "
+            f"{'/'.join(ColorMap[color] for color in colors)}, no edge has them.")
+        piece, orientation = EdgeByColors[colors]
+        if piece in edges:
+            raise ValueError(f"The edge {EdgeNames[piece]} appears twice, "
+            f"in {EdgeNames[edges.index(piece)]} and {name}.")
+        edges.append(piece)
+        flip += orientation
+    if twist%3 != 0:
+        raise ValueError(f"A corner is twisted: the orientations of the corners add "
+        f"{twist%3} (mod 3), they must add 0.")
+    if flip%2 != 0:
+        raise ValueError("An edge is flipped: the orientations of the edges add 1 (mod 2), "
+        "they must add 0.")
+    if PermutationParity(corners) != PermutationParity(edges):
+        raise ValueError("Permutation parity mismatch: two pieces are swapped, "
+        "the corners and the edges must have the same parity.")
+
+def PatternFromRows(AllRows):
+    """
+    Converts the rows of a CSV with the colors of a cube to a pattern
+    :param AllRows: list of 6 rows (one per face) with 9 color names each
+    :return: A 'pattern' dictionary for RubikPuzzle
+    :raises ValueError: with the reason if the rows are not a cube
+    """
+    pattern = {}
+    if len(AllRows) != 6:
+        raise ValueError(f"The CSV must have exactly 6 rows (one per face). Found {len(AllRows)}.")
+
+    for RowIndex, row in enumerate(AllRows):
+        
+        if len(row) != 9:
+            raise ValueError(f"The row {RowIndex+1} must have 9 color values. Found {len(row)}.\n"
+            f"Row data: {row}")
+        
+        LettersForFaces = faceLetters[RowIndex]
+        
+        for ColIndex, ColorName in enumerate(row):
+            ColorNameClean = ColorName.strip().lower()
+            
+            if ColorNameClean not in colorNameMap:
+                if ColorNameClean == "":
+                    raise ValueError(f"Empty cell found in row {RowIndex+1}, column {ColIndex+1}.")
+                raise ValueError(f"Unknown color '{ColorName}' in row {RowIndex+1}, column {ColIndex+1}.")
+            
+            letter = LettersForFaces[ColIndex]
+            color_code = colorNameMap[ColorNameClean]
+            pattern[letter] = color_code
+    return pattern
+
 def LoadCubeCSV(filename):
     """
     Loads a cube configuration from a CSV file.
@@ -546,42 +2185,19 @@ def LoadCubeCSV(filename):
     :return: A 'pattern' dictionary for RubikPuzzle, or None if there is an error
     """
     print(f"Loading the cube state from '{filename}'...")
-    pattern = {}
     try:
         with open(filename, 'r', newline='', encoding='utf-8') as f:
             reader = csv.reader(f)
             AllRows = list(reader)
-            
-            if len(AllRows) != 6:
-                print(f"Error: The CSV must have exactly 6 rows (one per face). Found {len(AllRows)}.")
-                return None
-
-            for RowIndex, row in enumerate(AllRows):
-                
-                if len(row) != 9:
-                    print(f"Error: The row {RowIndex+1} must have 9 color values. Found {len(row)}.")
-                    print(f"Row data: {row}")
-                    return None
-                
-                LettersForFaces = faceLetters[RowIndex]
-                
-                for ColIndex, ColorName in enumerate(row):
-                    ColorNameClean = ColorName.strip().lower()
-                    
-                    if ColorNameClean not in colorNameMap:
-                        if ColorNameClean == "":
-                            print(f"Error: Empty cell found in row {RowIndex+1}, column {ColIndex+1}.")
-                        else:
-                            print(f"Error: Unknown color '{ColorName}' in row {RowIndex+1}, column {ColIndex+1}.")
-                        return None
-                    
-                    letter = LettersForFaces[ColIndex]
-                    color_code = colorNameMap[ColorNameClean]
-                    pattern[letter] = color_code
+        pattern = PatternFromRows(AllRows)
+        ValidatePattern(pattern)
                     
     except FileNotFoundError:
         print(f"Error: File not found in '{filename}'")
         return None
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
     except Exception as e:
         print(f"An error occurred while reading the CSV: {e}")
         return None
@@ -616,25 +2232,36 @@ if __name__ == "__main__":
     print(f"\nCube loaded from '{CSVFile}':")
     print(InitialCube)
 
-    # Create pattern-based heuristics
+    # A cube solved before is answered by the cache, without the pdb
+    cache = SolutionCache(CacheFile)
     StartTime = time.time()
-    heuristic = PatternBasedHeuristic(depth=3) #Changes
-    EndTime = time.time()
-    TotalTime = EndTime - StartTime
-    print(f"Pdb generated in: {TotalTime:.2f} seconds\n")
+    cached = cache.Get(InitialCube.configuration)
+    if cached is not None:
+        solution = TrajectoryFromActions(InitialCube, cached)
+        NewTotalTime = time.time() - StartTime
+        print("\nSolution found in the cache")
+    else:
+        # Create pattern-based heuristics, computed only on the first run
+        heuristic = CornerPatternDatabase(directory=PatternDirectory)
+        EndTime = time.time()
+        TotalTime = EndTime - StartTime
+        print(f"Pdb generated in: {TotalTime:.2f} seconds\n")
 
-    # Define the functions required by A*
-    stop = lambda state: state.configuration == InitialConf
-    g = lambda state: state.GetDepth()
-    h = lambda state: heuristic.Heurisic(state)
+        # Define the functions required by A*
+        stop = lambda state: state.configuration == InitialConf
+        g = lambda state: state.GetDepth()
+        h = lambda state: heuristic.Heurisic(state)
 
-    print("\nExecute search A*...\n")
-    StartTime = time.time()
+        print("\nExecute search A*...\n")
+        StartTime = time.time()
 
-    solution = IDA_Star(InitialCube, stop, g, h)
+        solution = IDA_Star(InitialCube, stop, g, h, inplace=True)
 
-    EndTime = time.time()
-    NewTotalTime = EndTime - StartTime + TotalTime
+        EndTime = time.time()
+        NewTotalTime = EndTime - StartTime + TotalTime
+        if solution is not None:
+            cache.Put(InitialCube.configuration, TrajectoryActions(solution))
+    cache.close()
 
     # Results
     if solution is not None:
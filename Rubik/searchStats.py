@@ -0,0 +1,144 @@
+import json
+import time
+
+"""
+Counters of a search, one entry per IDA* iteration (bound):
+
+    generated    nodes evaluated by the heuristic
+    expanded     nodes inside the bound that were not the goal
+    goal_checks  calls to the stop function
+    lookups      queries to the pattern databases
+    misses       queries not found in a database, answered with depth+1
+    branching    generated / expanded
+    time         wall time of the iteration in seconds
+
+Nothing is counted unless a SearchStats is given to the search: the
+counters are added by wrapping h and stop, so the disabled search runs
+the same code as before. The databases only test their stats attribute.
+"""
+
+Counters = ("generated", "expanded", "goal_checks", "lookups", "misses")
+
+class SearchStats:
+    """
+    Collector of the counters of IDAStar and the pattern databases
+    """
+    def __init__(self, *heuristics):
+        """
+        :param heuristics: Pattern databases whose lookups are counted,
+        see Attach
+        """
+        self.iterations = []
+        self.current = None
+        for heuristic in heuristics:
+            self.Attach(heuristic)
+
+    def Attach(self, heuristic):
+        """
+        Counts the lookups of a heuristic, a PatternBasedHeuristic, a
+        DensePatternDatabase or all the databases of a CompositeHeuristic
+        :param heuristic: The heuristic
+        """
+        for database in getattr(heuristic, 'databases', [heuristic]):
+            database.stats = self
+
+    def Detach(self, heuristic):
+        """
+        Stops counting the lookups of a heuristic
+        """
+        for database in getattr(heuristic, 'databases', [heuristic]):
+            database.stats = None
+
+    def StartIteration(self, bound):
+        """
+        Opens the counters of a new bound
+        :param bound: The f-cost limit of the iteration
+        """
+        self.current = dict.fromkeys(Counters, 0)
+        self.current["bound"] = bound
+        self.current["start"] = time.perf_counter()
+        self.iterations.append(self.current)
+
+    def EndIteration(self, found=False):
+        """
+        Closes the counters of the current bound
+        :param found: True if the iteration found the goal
+        """
+        current = self.current
+        current["time"] = time.perf_counter() - current.pop("start")
+        current["found"] = found
+        current["branching"] = current["generated"]/current["expanded"] \
+        if current["expanded"] else 0.0
+        current["nodes_per_second"] = current["generated"]/current["time"] \
+        if current["time"] > 0 else 0.0
+        self.current = None
+
+    def Lookup(self, miss):
+        """
+        Called by the pattern databases on every query
+        :param miss: True if the key was not in the database
+        """
+        if self.current != None:
+            self.current["lookups"] += 1
+            if miss:
+                self.current["misses"] += 1
+
+    def CountHeuristic(self, h):
+        """
+        :param h: Heuristic function h(s)
+        :return: h that also counts the generated nodes
+        """
+        def counted(state):
+            self.current["generated"] += 1
+            return h(state)
+        return counted
+
+    def CountGoal(self, stop):
+        """
+        :param stop: Stop function
+        :return: stop that also counts the goal checks and the expanded
+        nodes, every node that passes the check of the bound is tested
+        and expanded if it is not the goal
+        """
+        def counted(state):
+            self.current["goal_checks"] += 1
+            if stop(state):
+                return True
+            self.current["expanded"] += 1
+            return False
+        return counted
+
+    def Totals(self):
+        """
+        :return: dictionary with the counters of all the iterations
+        """
+        totals = dict.fromkeys(Counters, 0)
+        totals["time"] = 0.0
+        for iteration in self.iterations:
+            for name in Counters:
+                totals[name] += iteration[name]
+            totals["time"] += iteration.get("time", 0.0)
+        totals["iterations"] = len(self.iterations)
+        totals["nodes_per_second"] = totals["generated"]/totals["time"] \
+        if totals["time"] > 0 else 0.0
+        totals["hit_rate"] = 1-totals["misses"]/totals["lookups"] \
+        if totals["lookups"] else 0.0
+        return totals
+
+    def ToDict(self):
+        """
+        :return: dictionary with the iterations and the totals
+        """
+        return {"iterations": self.iterations, "totals": self.Totals()}
+
+    def Dump(self, filename=None):
+        """
+        The counters as JSON
+        :param filename: File to write, if None only the text is returned
+        :return: The JSON text
+        """
+        text = json.dumps(self.ToDict(), indent=2)
+        if filename != None:
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(text+'\n')
+        return text
@@ -0,0 +1,109 @@
+import os
+import sqlite3
+from collections import OrderedDict
+
+"""
+Cache of solved cubes. The key is the bit-encoded configuration of the
+scrambled cube (162 bits, stored as hexadecimal text) and the value is
+its optimal list of actions. Two tiers:
+
+    memory   an OrderedDict with LRU eviction, at most capacity entries
+    disk     a SQLite table that persists between runs and processes
+
+Only the solutions of the optimal solvers must be stored, a cube that is
+found in the cache is answered without loading the pattern databases.
+"""
+
+# Default file of the cache, next to the scripts
+CacheFile = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'solutions.sqlite')
+
+def EncodeActions(actions):
+    """
+    :param actions: list of action tuples (axis, row, direction)
+    :return: text with 3 digits per action, '' for the solved cube
+    """
+    return ''.join(f"{axis}{row}{direction}" for axis, row, direction in actions)
+
+def DecodeActions(text):
+    """
+    :param text: text written by EncodeActions
+    :return: list of action tuples (axis, row, direction)
+    """
+    return [(int(text[i]), int(text[i+1]), int(text[i+2])) for i in range(0, len(text), 3)]
+
+class SolutionCache:
+    """
+    Persistent cache configuration -> optimal actions
+    """
+    def __init__(self, filename=CacheFile, capacity=10000):
+        """
+        Opens the cache, the file is created if it does not exist
+        :param filename: Path to the SQLite file, ':memory:' for a cache
+        that is not kept
+        :param capacity: Entries kept in memory
+        """
+        if filename != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        self.filename = filename
+        self.capacity = capacity
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Several processes can share the file, they wait for the lock
+        self.connection = sqlite3.connect(filename, timeout=30)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS solutions "
+        "(configuration TEXT PRIMARY KEY, actions TEXT NOT NULL, length INTEGER NOT NULL)")
+        self.connection.commit()
+
+    def Get(self, configuration):
+        """
+        :param configuration: The bit-encoded configuration of the cube
+        :return: list of the actions that solve it, None if not cached
+        """
+        if configuration in self.memory:
+            self.memory.move_to_end(configuration)
+            self.hits += 1
+            return list(self.memory[configuration])
+        row = self.connection.execute("SELECT actions FROM solutions WHERE configuration = ?",
+        (format(configuration, 'x'),)).fetchone()
+        if row == None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        actions = DecodeActions(row[0])
+        self.Remember(configuration, actions)
+        return list(actions)
+
+    def Put(self, configuration, actions):
+        """
+        Stores the solution of a cube in both tiers
+        :param configuration: The bit-encoded configuration of the cube
+        :param actions: list of the actions of an optimal solution
+        """
+        actions = [tuple(action) for action in actions]
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?, ?)",
+            (format(configuration, 'x'), EncodeActions(actions), len(actions)))
+        self.Remember(configuration, actions)
+
+    def Remember(self, configuration, actions):
+        """
+        Adds an entry to the memory tier, the least recently used entry
+        is evicted when it is full
+        """
+        self.memory[configuration] = tuple(actions)
+        self.memory.move_to_end(configuration)
+        while len(self.memory) > self.capacity:
+            self.memory.popitem(last=False)
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
@@ -0,0 +1,433 @@
+import os
+import sys
+import time
+from itertools import combinations, permutations
+import numpy as np
+from rubikCube import RubikPuzzle, ActionList, ActionNames, LoadCubeCSV
+from rubikCube import CornerMoveTable, EdgeMoveTable, CornerCoordinateTables
+from rubikCube import TrajectoryFromActions
+from rubikCube import CornerOrientations, CornerPermutations
+from cubieCube import CubieCube, ApplyCubieAction
+
+"""
+Two-phase solver (Kociemba). It does not look for the shortest solution
+but finds one of about 20-30 face turns very fast:
+
+    phase 1: from the cube to the subgroup <U,D,R2,L2,F2,B2>, where every
+             piece is oriented and the 4 edges of the middle slice (FR,
+             FL, BL, BR) are in the slice
+    phase 2: inside the subgroup, to the solved cube, only with the
+             moves of the subgroup
+
+Each phase works on small coordinates instead of the cube:
+
+    phase 1: twist of the corners (2187), flip of the edges (2048) and
+             the slots of the slice edges (495)
+    phase 2: permutation of the corners (40320), of the 8 U and D edges
+             (40320) and of the 4 slice edges (24)
+
+The moves of the coordinates are tables, and the distance to the goal of
+a pair of coordinates is a pruning table computed by a breadth-first
+search. The search counts face turns (U2 is a single move), the solution
+is given in the actions of RubikPuzzle, where U2 is two quarter turns.
+"""
+
+# Faces in the order of the search. The opposite face of f is (f+3)%6
+Faces = "URFDLB"
+
+def FaceTurns():
+    """
+    The 18 face turns, a clockwise, a half and a counterclockwise turn
+    of each face
+    :return: list of tuples (name, actions), actions are the quarter
+    turns of ActionList that make the turn
+    """
+    clockwise = {ActionNames[action]:action for action in ActionList}
+    turns = []
+    for face in Faces:
+        turns.append((face, [clockwise[face]]))
+        turns.append((face+"2", [clockwise[face]]*2))
+        turns.append((face+"'", [clockwise[face+"'"]]))
+    return turns
+
+Turns = FaceTurns()
+TurnCount = len(Turns)
+
+# Turns of the subgroup: any turn of U and D, half turns of R, F, L and B
+Phase2Turns = [m for m, (name, _) in enumerate(Turns)
+if name[0] in "UD" or name.endswith("2")]
+# The last turn of phase 1 must leave the subgroup, otherwise phase 2
+# could have done it and the same solution is found twice
+Phase1Last = [m for m in range(TurnCount) if m not in Phase2Turns]
+
+def AllowedTurn(last, m):
+    """
+    A turn of the same face as the last turn, or of the opposite face
+    after its pair in the order of Faces, gives a sequence that another
+    one already covers
+    :param last: The last face turn, None at the start
+    :param m: The next face turn
+    """
+    if last == None:
+        return True
+    face, previous = m//3, last//3
+    return face != previous and face+3 != previous
+
+# Turns that can follow each last turn, as MovePruning in rubikCube
+Phase1Successors = {last:[m for m in range(TurnCount) if AllowedTurn(last, m)]
+for last in [None]+list(range(TurnCount))}
+Phase2Successors = {last:[m for m in Phase2Turns if AllowedTurn(last, m)]
+for last in [None]+list(range(TurnCount))}
+
+def ComposeCubieMoves(first, second, turns):
+    """
+    The cubie move of an action followed by another one
+    :param first: tuple (permutation, orientation) of CornerMoveTable or EdgeMoveTable
+    :param second: the move applied after first
+    :param turns: 3 for the corners, 2 for the edges
+    :return: tuple (permutation, orientation), slot i receives the piece of
+    slot permutation[i] and adds orientation[i]
+    """
+    source, twist = first
+    after, added = second
+    return tuple(source[j] for j in after), \
+    tuple((twist[j]+added[i])%turns for i, j in enumerate(after))
+
+def TurnMoves(table, turns):
+    """
+    :param table: CornerMoveTable or EdgeMoveTable
+    :param turns: 3 for the corners, 2 for the edges
+    :return: list with the cubie move of each face turn
+    """
+    moves = []
+    for _, actions in Turns:
+        move = table[actions[0]]
+        for action in actions[1:]:
+            move = ComposeCubieMoves(move, table[action], turns)
+        moves.append(move)
+    return moves
+
+CornerTurns = TurnMoves(CornerMoveTable, 3)
+EdgeTurns = TurnMoves(EdgeMoveTable, 2)
+
+# Slots of the 4 slice edges. The list is reversed so the slots of the
+# solved cube, (8, 9, 10, 11), have the index 0
+SliceSlots = list(combinations(range(12), 4))[::-1]
+SliceIndex = {slots:index for index, slots in enumerate(SliceSlots)}
+EdgeFlips = 2048
+SlicePositions = len(SliceSlots)
+SlicePermutations = 24
+
+def PermutationRanks(pieces):
+    """
+    Lexicographic rank of many permutations at once
+    :param pieces: NumPy array, one permutation of 0..n-1 per row
+    :return: NumPy array with the rank of each row
+    """
+    n = pieces.shape[1]
+    rank = np.zeros(pieces.shape[0], dtype=np.int32)
+    for i in range(n-1):
+        smaller = (pieces[:,i+1:] < pieces[:,i:i+1]).sum(axis=1)
+        rank = rank*(n-i)+smaller
+    return rank
+
+def Phase1Tables():
+    """
+    Move tables of the coordinates of phase 1
+    :return: tuple (twist, flip, slice), arrays of shape (2187, 18),
+    (2048, 18) and (495, 18)
+    """
+    # The quarter turns come from the corner tables of rubikCube
+    _, quarter = CornerCoordinateTables()
+    column = {action:m for m, action in enumerate(ActionList)}
+    twist = np.zeros((CornerOrientations,TurnCount), dtype=np.int32)
+    for m, (_, actions) in enumerate(Turns):
+        index = np.arange(CornerOrientations)
+        for action in actions:
+            index = quarter[index,column[action]]
+        twist[:,m] = index
+    flip = np.zeros((EdgeFlips,TurnCount), dtype=np.int32)
+    for index in range(EdgeFlips):
+        flips = [(index>>(10-k))&1 for k in range(11)]
+        flips.append(sum(flips)%2)
+        for m, (source, added) in enumerate(EdgeTurns):
+            moved = [(flips[j]+added[i])%2 for i, j in enumerate(source)]
+            flip[index,m] = sum(bit<<(10-k) for k, bit in enumerate(moved[:11]))
+    position = np.zeros((SlicePositions,TurnCount), dtype=np.int32)
+    for index, slots in enumerate(SliceSlots):
+        for m, (source, _) in enumerate(EdgeTurns):
+            moved = tuple(i for i, j in enumerate(source) if j in slots)
+            position[index,m] = SliceIndex[moved]
+    return twist, flip, position
+
+def Phase2Tables():
+    """
+    Move tables of the coordinates of phase 2, only for the turns of the
+    subgroup, the other columns are -1
+    :return: tuple (corners, edges, slice), arrays of shape (40320, 18),
+    (40320, 18) and (24, 18)
+    """
+    corners = np.full((CornerPermutations,TurnCount), -1, dtype=np.int32)
+    edges = np.full((CornerPermutations,TurnCount), -1, dtype=np.int32)
+    middle = np.full((SlicePermutations,TurnCount), -1, dtype=np.int32)
+    # permutations() is in lexicographic order, the row is the rank
+    pieces = np.array(list(permutations(range(8))), dtype=np.int8)
+    SlicePieces = np.array(list(permutations(range(4))), dtype=np.int8)
+    for m in Phase2Turns:
+        source, _ = CornerTurns[m]
+        corners[:,m] = PermutationRanks(pieces[:,source])
+        source, _ = EdgeTurns[m]
+        # The turns of the subgroup keep the U and D edges in their layers
+        assert max(source[:8]) < 8 and min(source[8:]) >= 8
+        edges[:,m] = PermutationRanks(pieces[:,source[:8]])
+        middle[:,m] = PermutationRanks(SlicePieces[:,[j-8 for j in source[8:]]])
+    return corners, edges, middle
+
+def PruningTable(first, second, moves):
+    """
+    Number of face turns from each pair of coordinates to the goal (0, 0),
+    a breadth-first search on the whole table with NumPy
+    :param first: Move table of the first coordinate
+    :param second: Move table of the second coordinate
+    :param moves: The columns (face turns) that can be used
+    :return: bytes, the entry of (a, b) is a*len(second)+b
+    """
+    size = len(second)
+    unknown = 255
+    table = np.full(len(first)*size, unknown, dtype=np.uint8)
+    table[0] = 0
+    level = 0
+    while True:
+        frontier = np.flatnonzero(table == level)
+        if frontier.size == 0:
+            break
+        a, b = np.divmod(frontier, size)
+        for m in moves:
+            children = first[a,m]*size+second[b,m]
+            table[children[table[children] == unknown]] = level+1
+        level += 1
+    return table.tobytes()
+
+class TwoPhaseSolver:
+    """
+    Tables and search of the two-phase solver. The tables are computed
+    once, in a few seconds, and the same solver can solve many cubes
+    """
+    def __init__(self):
+        twist, flip, position = Phase1Tables()
+        corners, edges, middle = Phase2Tables()
+        AllTurns = range(TurnCount)
+        self.TwistSlice = PruningTable(twist, position, AllTurns)
+        self.FlipSlice = PruningTable(flip, position, AllTurns)
+        self.CornerSlice = PruningTable(corners, middle, Phase2Turns)
+        self.EdgeSlice = PruningTable(edges, middle, Phase2Turns)
+        # Lists of lists, indexing them is faster than NumPy in the search
+        self.TwistMove = twist.tolist()
+        self.FlipMove = flip.tolist()
+        self.SliceMove = position.tolist()
+        self.CornerMove = corners.tolist()
+        self.EdgeMove = edges.tolist()
+        self.MiddleMove = middle.tolist()
+        # Permutation ranks of the state of a cube at the start of phase 2
+        self.Ranks = {p:rank for rank, p in enumerate(permutations(range(8)))}
+        self.SliceRanks = {p:rank for rank, p in enumerate(permutations(range(4)))}
+
+    def Phase1Coordinates(self, state):
+        """
+        :param state: bytes of a CubieCube
+        :return: tuple (twist, flip, slice) of the state
+        """
+        twist = 0
+        for value in state[:7]:
+            twist = twist*3+value%3
+        flip = 0
+        for value in state[8:19]:
+            flip = flip*2+value%2
+        slots = tuple(i for i, value in enumerate(state[8:]) if value//2 >= 8)
+        return twist, flip, SliceIndex[slots]
+
+    def Phase2Coordinates(self, state):
+        """
+        :param state: bytes of a CubieCube inside the subgroup
+        :return: tuple (corners, edges, slice) of the state
+        """
+        return self.Ranks[tuple(value//3 for value in state[:8])], \
+        self.Ranks[tuple(value//2 for value in state[8:16])], \
+        self.SliceRanks[tuple(value//2-8 for value in state[16:])]
+
+    def Solve(self, puzzle, budget=0, MaxLength=30):
+        """
+        Solves a cube
+        :param puzzle: The RubikPuzzle to solve
+        :param budget: Seconds to keep looking for shorter solutions after
+        the first one, 0 returns the first solution
+        :param MaxLength: Maximum number of face turns of the solution
+        :return: list of face turns (indices of Turns), None if there
+        is no solution of MaxLength turns or less
+        """
+        self.start = CubieCube.FromConfiguration(puzzle.configuration).state
+        self.best = None
+        self.limit = MaxLength
+        self.budget = budget
+        self.deadline = time.perf_counter()+budget
+        twist, flip, position = self.Phase1Coordinates(self.start)
+        depth = max(self.TwistSlice[twist*SlicePositions+position],
+        self.FlipSlice[flip*SlicePositions+position])
+        path = []
+        # A phase 1 of as many turns as the best solution can not improve it
+        while depth <= self.limit and (self.best == None or depth < len(self.best)):
+            if self.Phase1(twist, flip, position, depth, path):
+                break
+            depth += 1
+        return self.best
+
+    def Phase1(self, twist, flip, position, togo, path):
+        """
+        Depth-first search of the phase 1 sequences of exactly togo more
+        turns, each one is completed by phase 2
+        :param twist: Twist of the corners
+        :param flip: Flip of the edges
+        :param position: Slots of the slice edges
+        :param togo: Turns left in phase 1
+        :param path: Face turns of phase 1 so far
+        :return: True when the search must stop
+        """
+        if togo == 0:
+            if twist == 0 and flip == 0 and position == 0 and \
+            (not path or path[-1] in Phase1Last):
+                return self.Phase2Start(path)
+            return False
+        # The budget only counts once there is a solution
+        if self.best != None and time.perf_counter() > self.deadline:
+            return True
+        last = path[-1] if path else None
+        TwistRow = self.TwistMove[twist]
+        FlipRow = self.FlipMove[flip]
+        SliceRow = self.SliceMove[position]
+        for m in Phase1Successors[last]:
+            t = TwistRow[m]
+            p = SliceRow[m]
+            if self.TwistSlice[t*SlicePositions+p] >= togo:
+                continue
+            f = FlipRow[m]
+            if self.FlipSlice[f*SlicePositions+p] >= togo:
+                continue
+            path.append(m)
+            done = self.Phase1(t, f, p, togo-1, path)
+            path.pop()
+            if done:
+                return True
+        return False
+
+    def Phase2Start(self, path):
+        """
+        Solves phase 2 after a phase 1 sequence, with fewer turns than the
+        best solution so far
+        :param path: Face turns of phase 1
+        :return: True when the search must stop
+        """
+        # Turns left for phase 2, a solution must improve the best one
+        remaining = self.limit-len(path)
+        if self.best != None:
+            remaining = min(remaining, len(self.best)-1-len(path))
+        state = self.start
+        for m in path:
+            for action in Turns[m][1]:
+                state = ApplyCubieAction(state, action)
+        corners, edges, middle = self.Phase2Coordinates(state)
+        depth = max(self.CornerSlice[corners*SlicePermutations+middle],
+        self.EdgeSlice[edges*SlicePermutations+middle])
+        while depth <= remaining:
+            solution = []
+            if self.Phase2(corners, edges, middle, depth, path[-1] if path else None, solution):
+                self.best = path+solution[::-1]
+                # Without a budget the first solution is the answer
+                return self.budget <= 0
+            depth += 1
+        return False
+
+    def Phase2(self, corners, edges, middle, togo, last, solution):
+        """
+        Depth-first search of phase 2 with exactly togo turns
+        :param solution: Filled with the turns in reverse order when found
+        :return: True if the cube is solved
+        """
+        if togo == 0:
+            return corners == 0 and edges == 0 and middle == 0
+        # Rows and tables in locals, this loop is most of the time
+        CornerRow = self.CornerMove[corners]
+        EdgeRow = self.EdgeMove[edges]
+        MiddleRow = self.MiddleMove[middle]
+        CornerSlice, EdgeSlice = self.CornerSlice, self.EdgeSlice
+        for m in Phase2Successors[last]:
+            s = MiddleRow[m]
+            c = CornerRow[m]
+            if CornerSlice[c*SlicePermutations+s] >= togo:
+                continue
+            e = EdgeRow[m]
+            if EdgeSlice[e*SlicePermutations+s] >= togo:
+                continue
+            if self.Phase2(c, e, s, togo-1, m, solution):
+                solution.append(m)
+                return True
+        return False
+
+def TurnActions(turns):
+    """
+    :param turns: list of face turns, indices of Turns
+    :return: the quarter-turn actions of RubikPuzzle
+    """
+    return [action for m in turns for action in Turns[m][1]]
+
+def Two_Phase(p, budget=0, solver=None):
+    """
+    Two-phase solver, the counterpart of IDA_Star
+    :param p: The puzzle to solve
+    :param budget: Seconds to keep looking for shorter solutions
+    :param solver: A TwoPhaseSolver, computed here if not given
+    :return: The trajectory of the solution, None if not found
+    """
+    if solver == None:
+        solver = TwoPhaseSolver()
+    turns = solver.Solve(p, budget)
+    if turns == None:
+        return None
+    return TrajectoryFromActions(p, TurnActions(turns))
+
+if __name__ == "__main__":
+
+    ScriptDir = os.path.dirname(os.path.abspath(__file__))
+    # File of the cube and seconds to look for shorter solutions
+    CSVFile = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ScriptDir, 'Moves.csv')
+    budget = float(sys.argv[2]) if len(sys.argv) > 2 else 0
+
+    ScramblePattern = LoadCubeCSV(CSVFile)
+    if ScramblePattern is None:
+        print("Error loading cube from CSV. Exiting.")
+        sys.exit(1)
+
+    InitialCube = RubikPuzzle(pattern=ScramblePattern)
+    print(f"\nCube loaded from '{CSVFile}':")
+    print(InitialCube)
+
+    StartTime = time.time()
+    solver = TwoPhaseSolver()
+    print(f"Tables generated in: {time.time()-StartTime:.2f} seconds\n")
+
+    StartTime = time.time()
+    turns = solver.Solve(InitialCube, budget)
+    TotalTime = time.time()-StartTime
+
+    if turns is not None:
+        solution = TrajectoryFromActions(InitialCube, TurnActions(turns))
+        print(f"Solution found in {len(turns)} face turns ({len(solution)-1} movements): "
+        f"{' '.join(Turns[m][0] for m in turns)}")
+        print(f"Search Time: {TotalTime:.2f} seconds\n")
+        print("Solution path:\n")
+
+        for i, state in enumerate(solution):
+            print(f"Step {i}:")
+            print(state)
+            print("-" * 40)
+    else:
+        print("Not found solution")
@@ -1,5 +1,9 @@
 import lines 
 import heapq #Priority queue
+import numpy as np #arrays of the compiled graph
+import os
+
+RoutesFile = os.path.join(os.path.dirname(os.path.abspath(__file__)), "routes.npz") #saved all-pairs table
 
 
 class Nodo(): #represent a single station
@@ -13,15 +17,187 @@ class Nodo(): #represent a single station
         if neighbor != self.name and neighbor not in self.neighbors: #avoid adding itself as neighbor and duplicates
             self.neighbors.append((neighbor, distance)) 
 
+class CompiledGraph: #the network with integer station IDs, compiled once
+    """
+    Compressed sparse rows (CSR): the neighbors of the station i are
+    targets[offsets[i]:offsets[i+1]], at the distances in the same slice
+    of weights. The names are only used to enter and leave, the search
+    works with the IDs. The distance and parent buffers are allocated
+    once, a query starts a new generation instead of clearing them: a
+    station whose stamp is not the current generation was not reached
+    """
+    def __init__(self, vertices):
+        self.names = list(vertices) #ID -> station name
+        self.ids = {name: i for i, name in enumerate(self.names)} #station name -> ID
+        for name in vertices: #neighbors that are not stations of the dictionary also get an ID
+            for neighbor, _ in vertices[name]["neighbors"]:
+                if neighbor not in self.ids:
+                    self.ids[neighbor] = len(self.names)
+                    self.names.append(neighbor)
+        n = len(self.names)
+        edges = [[] for _ in range(n)] #distinct (target, distance) of each station
+        for name in vertices:
+            for neighbor, distance in vertices[name]["neighbors"]:
+                if neighbor != name and (self.ids[neighbor], distance) not in edges[self.ids[name]]:
+                    edges[self.ids[name]].append((self.ids[neighbor], distance))
+        self.offsets = np.zeros(n+1, dtype=np.int32)
+        self.offsets[1:] = np.cumsum([len(e) for e in edges])
+        self.targets = np.array([t for e in edges for t, _ in e], dtype=np.int32)
+        self.weights = np.array([d for e in edges for _, d in e], dtype=np.int64)
+        #the Python loop reads single elements, faster from lists than from NumPy scalars
+        self._offsets = self.offsets.tolist()
+        self._targets = self.targets.tolist()
+        self._weights = self.weights.tolist()
+        #reusable buffers of the queries
+        self.dist = [0]*n #cost from the start, valid if stamp == generation
+        self.parent = [-1]*n #previous station in the shortest path
+        self.stamp = [0]*n #generation in which the station was reached
+        self.generation = 0
+
+    def __len__(self):
+        return len(self.names)
+
+    def Dijkstra(self, initial, final): #Dijkstra over the IDs
+        """
+        :param initial: ID of the initial station
+        :param final: ID of the final station
+        :return: tuple (list of IDs of the path, distance), (None, inf) if
+        there is no path
+        """
+        self.generation += 1 #all the previous distances become stale
+        generation = self.generation
+        dist, parent, stamp = self.dist, self.parent, self.stamp
+        offsets, targets, weights = self._offsets, self._targets, self._weights
+        dist[initial] = 0
+        parent[initial] = -1
+        stamp[initial] = generation
+        priority = [(0, initial)]
+        while priority:
+            cost, current = heapq.heappop(priority)
+            if cost > dist[current]: #stale entry, the station was improved later
+                continue
+            if current == final: #reconstruct the path with the parents
+                path = []
+                while current != -1:
+                    path.append(current)
+                    current = parent[current]
+                path.reverse()
+                return path, cost
+            for k in range(offsets[current], offsets[current+1]):
+                neighbor = targets[k]
+                new_cost = cost + weights[k]
+                if stamp[neighbor] != generation or new_cost < dist[neighbor]:
+                    stamp[neighbor] = generation
+                    dist[neighbor] = new_cost
+                    parent[neighbor] = current
+                    heapq.heappush(priority, (new_cost, neighbor))
+        return None, float('inf')
+
+class RouteTable: #shortest distance and next station of every pair of stations
+    """
+    All pairs, built with Floyd-Warshall in NumPy: dist[i, j] is the
+    shortest distance from the station i to the station j, and
+    next[i, j] is the station that follows i on that path (-1 if there
+    is none). A distance is one lookup and a path follows next, one
+    lookup per station. The table is saved with the names and the edges
+    of the network, a file of another network is not used
+    """
+    def __init__(self, names, dist, next_hop, fingerprint):
+        self.names = list(names) #ID -> station name
+        self.ids = {name: i for i, name in enumerate(self.names)} #station name -> ID
+        self.dist = dist
+        self.next = next_hop
+        self.fingerprint = fingerprint
+        #single lookups are faster on lists than on NumPy scalars
+        self._dist = dist.tolist()
+        self._next = next_hop.tolist()
+
+    @staticmethod
+    def Fingerprint(compiled): #identifies the network of a table
+        return np.concatenate([compiled.offsets.astype(np.int64), compiled.targets.astype(np.int64),
+        compiled.weights]).tobytes() + "\n".join(compiled.names).encode("utf-8")
+
+    @staticmethod
+    def Build(compiled): #Floyd-Warshall on the CSR arrays
+        n = len(compiled)
+        dist = np.full((n, n), np.inf)
+        next_hop = np.full((n, n), -1, dtype=np.int32)
+        sources = np.repeat(np.arange(n), np.diff(compiled.offsets))
+        np.minimum.at(dist, (sources, compiled.targets), compiled.weights.astype(np.float64))
+        next_hop[sources, compiled.targets] = compiled.targets
+        np.fill_diagonal(dist, 0)
+        np.fill_diagonal(next_hop, np.arange(n))
+        for k in range(n): #paths that can go through the station k
+            via = dist[:, k, None] + dist[None, k, :]
+            better = via < dist
+            dist = np.where(better, via, dist)
+            next_hop = np.where(better, next_hop[:, k, None], next_hop) #the first step is the one towards k
+        return RouteTable(compiled.names, dist, next_hop, RouteTable.Fingerprint(compiled))
+
+    def Save(self, filename=RoutesFile):
+        np.savez(filename, names=np.array(self.names), dist=self.dist, next=self.next,
+        fingerprint=np.frombuffer(self.fingerprint, dtype=np.uint8))
+
+    @staticmethod
+    def Load(compiled, filename=RoutesFile): #the saved table, None if it is missing or of another network
+        if not os.path.exists(filename):
+            return None
+        with np.load(filename) as data:
+            if data["fingerprint"].tobytes() != RouteTable.Fingerprint(compiled):
+                return None
+            return RouteTable(data["names"].tolist(), data["dist"], data["next"], data["fingerprint"].tobytes())
+
+    def Distance(self, InitialNode, FinalNode): #O(1)
+        distance = self._dist[self.ids[InitialNode]][self.ids[FinalNode]]
+        return int(distance) if distance != float('inf') else distance
+
+    def Path(self, InitialNode, FinalNode): #O(length of the path)
+        current, final = self.ids[InitialNode], self.ids[FinalNode]
+        if self._next[current][final] == -1:
+            return None, float('inf')
+        path = [InitialNode]
+        while current != final:
+            current = self._next[current][final]
+            path.append(self.names[current])
+        return path, self.Distance(InitialNode, FinalNode)
+
 class Graph: #represent the subway network
     def __init__(self):
         self.vertices = {} #dictionary of stations
         self.fathers = {} #to reconstruct the path
+        self.compiled = None #CompiledGraph, built at the first query
+        self.routes = None #RouteTable, see LoadRoutes
 
     def AddVertice(self, name_station, datos_station):
         self.vertices[name_station] = datos_station #add station to the graph
-
-    def Dijkstra(self, InitialNode, FinalNode): #Dijkstra's algorithm to find the shortest path
+        self.compiled = None #the compiled graph is rebuilt with the new station
+        self.routes = None
+
+    def Compile(self): #integer IDs and CSR arrays, call it again if the neighbors change
+        self.compiled = CompiledGraph(self.vertices)
+        return self.compiled
+
+    def LoadRoutes(self, filename=RoutesFile): #the all-pairs table, built and saved if the file does not match
+        compiled = self.compiled if self.compiled != None else self.Compile()
+        self.routes = RouteTable.Load(compiled, filename)
+        if self.routes is None:
+            self.routes = RouteTable.Build(compiled)
+            self.routes.Save(filename)
+        return self.routes
+
+    def ShortestPath(self, InitialNode, FinalNode): #from the table if it was loaded, else Dijkstra
+        if self.routes != None:
+            return self.routes.Path(InitialNode, FinalNode)
+        return self.Dijkstra(InitialNode, FinalNode)
+
+    def Dijkstra(self, InitialNode, FinalNode): #Dijkstra's algorithm on the compiled graph
+        compiled = self.compiled if self.compiled != None else self.Compile()
+        path, distance = compiled.Dijkstra(compiled.ids[InitialNode], compiled.ids[FinalNode])
+        if path is None:
+            return None, distance
+        return [compiled.names[i] for i in path], distance
+
+    def DijkstraByName(self, InitialNode, FinalNode): #Dijkstra's algorithm with the names, kept as reference
 
         self.fathers.clear() #clear previous path data
         
@@ -63,7 +239,7 @@ class Graph: #represent the subway network
             print(f"One or more subway stations weren't found.")
             return
 
-        path, distance = self.Dijkstra(InitialNode, FinalNode) #find the shortest path using Dijkstra's algorithm
+        path, distance = self.ShortestPath(InitialNode, FinalNode) #find the shortest path, from the table or with Dijkstra
         if path: #if a path was found
             print(f"total distance: {distance / 1000:.2f} km")
             print(f"Number of stations: {len(path)}")
@@ -71,7 +247,7 @@ class Graph: #represent the subway network
         else:
             print(f"No path found from {InitialNode} to {FinalNode}")
 
-def main():
+def BuildNetwork(): #the graph with the stations of all the lines
     STC_Metro = Graph() #create the subway graph
   
     for line_data in lines.lineas_with_data.values():
@@ -86,6 +262,13 @@ def main():
                 if (neighbor, distance) not in neighbors_actuales: #check if neighbor is already in the list
                     neighbors_actuales.append((neighbor, distance)) #add neighbor if not already present
 
+    STC_Metro.Compile() #the network is complete
+    return STC_Metro
+
+def main():
+    STC_Metro = BuildNetwork() #create the subway graph
+    STC_Metro.LoadRoutes() #all the routes, computed only the first time
+
     #Route 1
     InitialState1 = "Pantitlán"
     FinalStation1 = "Barranca del Muerto"
@@ -176,4 +359,5 @@ def main():
     STC_Metro.FindPathDijkstra(InitialState10, FinalStation10)
     print("\nHappy travels!\n-----------------------")
     
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()